@@ -1,16 +1,16 @@
 import logging
-import duckdb
 import streamlit as st
 import pandas as pd
 import asyncio
-from meteora_project import config
-from meteora_project.apis.jupiter import get_organic_score
+import duckdb
+from meteora_project import analytics, config, metrics, profiling, queries
+from meteora_project.cache import SnapshotCache, compact_frame, estimate_size
+from meteora_project.prewarm import read_manifest, read_summary
+from meteora_project.queries import TIMEFRAMES
+from meteora_project.search import SearchIndex
 from ratelimit import sleep_and_retry
-from tenacity import retry, wait_exponential
-from st_aggrid import AgGrid, GridUpdateMode, GridOptionsBuilder
-import altair as alt
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
-TIMEFRAMES = [5, 15, 30, 60, 120, 360, 720, 1440]
 TIMEFRAME_LABELS = {
   5: "5 minutes", 
   15: "15 minutes", 
@@ -48,365 +48,161 @@ logging.getLogger('streamlit.runtime').setLevel(logging.WARNING)
 logging.getLogger('streamlit.server').setLevel(logging.WARNING)
 logging.getLogger('watchdog.observers.inotify_buffer').setLevel(logging.WARNING)
 
+QUERY_SECONDS = metrics.histogram("dashboard_query_seconds", "Duration of dashboard result cache misses", ["query"])
+RESULT_BYTES = metrics.gauge("dashboard_result_bytes", "Memory used by the last result computed for each dashboard query", ["query"])
+
+# Columns used by the dashboard; results are cached with only these
+SUMMARY_COLUMNS = [
+  "dttm", "name", "pair_address", "bin_step", "base_fee_percentage", "liquidity",
+  "pct_minutes_with_volume", "pct_geek_fees_liquidity_24h", "pct_below_max", "bins_below_max", "bins_range",
+]
+PAIR_DETAIL_COLUMNS = ["dttm", "price", "liquidity", "fees", "pct_geek_fees_liquidity_24h"]
+
+@st.cache_resource
+def get_result_cache():
+  # One cache per server process, shared by every session
+  return SnapshotCache(max_bytes=config.RESULT_CACHE_MAX_MB * 1024 * 1024, name="dashboard")
+
+@st.cache_resource
+def get_search_index():
+  # One index per server process, extended with the new pairs of each snapshot
+  return SearchIndex()
+
+@st.cache_data(ttl=config.SNAPSHOT_CHECK_SECONDS, show_spinner=False)
+def write_dashboard_metrics():
+  # Streamlit cannot serve /metrics itself, so the collector serves this file
+  metrics.write_textfile("dashboard")
+
+@st.cache_data(ttl=config.SNAPSHOT_CHECK_SECONDS, show_spinner=False)
+def get_manifest():
+  # Prefer the manifest prewarmed by the collector, falling back to the database
+  manifest = read_manifest()
+  if manifest is None:
+    manifest = query_manifest()
+  return manifest
+
+def get_snapshot():
+  return get_manifest()["snapshot"]
+
+def cached(key, compute, *args, spinner=None):
+  def compute_with_spinner():
+    with QUERY_SECONDS.time(query=key):
+      if spinner is None:
+        value = compute(*args)
+      else:
+        with st.spinner(spinner):
+          value = compute(*args)
+    RESULT_BYTES.set(estimate_size(value), query=key)
+    return value
+  return get_result_cache().get_or_compute(get_snapshot(), (key, *args), compute_with_spinner)
+
+def get_update_count():
+  return get_manifest()["update_count"]
+
+def get_summary_data(num_minutes):
+  return cached("summary", load_summary_data, num_minutes, spinner="Fetching data...")
+
+def get_pair_details(pair_address, num_minutes):
+  return cached("pair_details", query_pair_details, pair_address, num_minutes, spinner="Fetching pair details...")
+
+def load_summary_data(num_minutes):
+  if num_minutes in get_manifest()["timeframes"]:
+    summary_data = read_summary(num_minutes)
+    if summary_data is not None:
+      return compact_frame(summary_data, SUMMARY_COLUMNS)
+  return query_summary_data(num_minutes)
+
 @sleep_and_retry
 @retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
-@st.cache_data()
-def get_update_count():
-  conn = duckdb.connect(config.DB_FILENAME, read_only=True)
-  query = "SELECT count(DISTINCT created_at) FROM pair_history"
-  update_count = conn.execute(query).fetchone()[0]
+def query_manifest():
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
+  manifest = {
+    "snapshot": queries.get_snapshot(conn),
+    "update_count": queries.get_update_count(conn),
+    "timeframes": [],
+    "partial_snapshots": {},
+  }
   conn.close()
-  return update_count
+  return manifest
 
 @sleep_and_retry
 @retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
-@st.cache_data(show_spinner="Fetching data...")
-def get_summary_data(num_minutes):
-  conn = duckdb.connect(config.DB_FILENAME, read_only=True)
-  query = f"""
-    WITH updates AS (
-      SELECT DISTINCT created_at
-      FROM pair_history
-      ORDER BY created_at DESC
-      LIMIT {num_minutes}
-    ), cumulative_stats AS (
-      SELECT h.created_at,
-        p.name,
-        p.pair_address,
-        p.bin_step,
-        p.base_fee_percentage,
-        h.price,
-        h.liquidity,
-        h.fees,
-        count(*) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) num_minutes,
-        avg(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) avg_price,
-        sum(h.fees) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) cumulative_fees,
-        avg(h.liquidity) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) avg_liquidity,
-        round(
-          stddev_samp(h.liquidity) OVER (
-            PARTITION BY p.id
-            ORDER BY created_at
-          ),
-          2
-        ) liquidity_std_dev,
-        round(liquidity_std_dev / avg_liquidity, 2) liquidity_volatility_ratio,
-        CASE
-          WHEN avg_liquidity = 0 THEN 0
-          ELSE 100 * cumulative_fees / (avg_liquidity + liquidity_std_dev)
-        END pct_geek_fees_liquidity,
-        round(
-          60 * 24 * pct_geek_fees_liquidity / num_minutes,
-          2
-        ) pct_geek_fees_liquidity_24h,
-        count(*) FILTER (fees > 0) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) num_minutes_with_volume,
-        round(100 * num_minutes_with_volume / num_minutes) pct_minutes_with_volume,
-        coalesce(
-          lag(h.price) OVER (
-            PARTITION BY p.id
-            ORDER BY created_at
-          ) < h.price,
-          false
-        ) tick_up,
-        coalesce(
-          lag(h.price) OVER (
-            PARTITION BY p.id
-            ORDER BY created_at
-          ) > h.price,
-          false
-        ) tick_down,
-        min(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) min_price,
-        max(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) max_price,
-        round(100 * (max_price - min_price) / min_price, 2) pct_price_range,
-        ceil(log(max_price / min_price) / log(1 + p.bin_step / 10000.0)) bins_range,
-        ceil(bins_range / 69) num_positions_range,
-        100 * (max_price - h.price) / max_price pct_below_max,
-        ceil(log(1 + pct_below_max / 100) / log(1 + p.bin_step / 10000.0)) bins_below_max,
-        bins_below_max <= 7 near_max,
-        stddev_samp(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) std_dev_price,
-        std_dev_price / avg_price price_volatility_ratio
-      FROM pair_history h
-        JOIN pairs p ON h.pair_id = p.id
-      WHERE NOT p.is_blacklisted
-        AND h.created_at IN (
-          SELECT created_at
-          from updates
-        )
-    )
-    SELECT created_at dttm,
-      name,
-      pair_address,
-      bin_step,
-      base_fee_percentage,
-      price,
-      liquidity,
-      fees,
-      num_minutes,
-      avg_price,
-      cumulative_fees,
-      avg_liquidity,
-      liquidity_std_dev,
-      liquidity_volatility_ratio,
-      pct_geek_fees_liquidity,
-      pct_geek_fees_liquidity_24h,
-      stddev_samp(pct_geek_fees_liquidity_24h) OVER (
-        PARTITION BY pair_address
-        ORDER BY created_at
-      ) std_dev_pct_geek_fees_liquidity_24h,
-      std_dev_pct_geek_fees_liquidity_24h / pct_geek_fees_liquidity_24h pct_geek_fees_liquidity_24h_volatility_ratio,
-      num_minutes_with_volume,
-      pct_minutes_with_volume,
-      sum(tick_up) OVER (
-        PARTITION BY pair_address
-        ORDER BY created_at
-      ) num_tick_up,
-      sum(tick_down) OVER (
-        PARTITION BY pair_address
-        ORDER BY created_at
-      ) num_tick_down,
-      round(
-        100 * num_tick_up / (num_tick_up + num_tick_down)
-      ) pct_tick_up,
-      min_price,
-      max_price,
-      pct_price_range,
-      bins_range,
-      num_positions_range,
-      pct_below_max,
-      bins_below_max,
-      near_max,
-      std_dev_price,
-      price_volatility_ratio
-    FROM cumulative_stats
-    WHERE
-      created_at = (SELECT max(created_at) FROM pair_history)
-      AND num_minutes >= {num_minutes * 0.9}
-  """
-  summary_data = conn.execute(query).fetchdf()
+def query_summary_data(num_minutes):
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
+  summary_data = queries.get_summary_data(conn, num_minutes, SUMMARY_COLUMNS)
   conn.close()
-  return summary_data
+  return compact_frame(summary_data)
 
 @sleep_and_retry
 @retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
-@st.cache_data(ttl=60, show_spinner="Fetching pair details...")
-def get_pair_details(pair_address, num_minutes):
-  conn = duckdb.connect(config.DB_FILENAME, read_only=True)
-  query = f"""
-    WITH updates AS (
-      SELECT DISTINCT created_at
-      FROM pair_history
-      ORDER BY created_at DESC
-      LIMIT {num_minutes}
-    ), cumulative_stats AS (
-      SELECT h.created_at,
-        p.name,
-        p.pair_address,
-        p.bin_step,
-        p.base_fee_percentage,
-        h.price,
-        h.liquidity,
-        h.fees,
-        count(*) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) num_minutes,
-        avg(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) avg_price,
-        sum(h.fees) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) cumulative_fees,
-        avg(h.liquidity) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) avg_liquidity,
-        round(
-          stddev_samp(h.liquidity) OVER (
-            PARTITION BY p.id
-            ORDER BY created_at
-          ),
-          2
-        ) liquidity_std_dev,
-        round(liquidity_std_dev / avg_liquidity, 2) liquidity_volatility_ratio,
-        CASE
-          WHEN avg_liquidity = 0 THEN 0
-          ELSE 100 * cumulative_fees / (avg_liquidity + liquidity_std_dev)
-        END pct_geek_fees_liquidity,
-        round(
-          60 * 24 * pct_geek_fees_liquidity / num_minutes,
-          2
-        ) pct_geek_fees_liquidity_24h,
-        count(*) FILTER (fees > 0) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) num_minutes_with_volume,
-        round(100 * num_minutes_with_volume / num_minutes) pct_minutes_with_volume,
-        coalesce(
-          lag(h.price) OVER (
-            PARTITION BY p.id
-            ORDER BY created_at
-          ) < h.price,
-          false
-        ) tick_up,
-        coalesce(
-          lag(h.price) OVER (
-            PARTITION BY p.id
-            ORDER BY created_at
-          ) > h.price,
-          false
-        ) tick_down,
-        min(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) min_price,
-        max(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) max_price,
-        round(100 * (max_price - min_price) / min_price, 2) pct_price_range,
-        ceil(log(max_price / min_price) / log(1 + p.bin_step / 10000.0)) bins_range,
-        ceil(bins_range / 69) num_positions_range,
-        100 * (max_price - h.price) / max_price pct_below_max,
-        ceil(log(1 + pct_below_max / 100) / log(1 + p.bin_step / 10000.0)) bins_below_max,
-        bins_below_max <= 7 near_max,
-        stddev_samp(h.price) OVER (
-          PARTITION BY p.id
-          ORDER BY created_at
-        ) std_dev_price,
-        std_dev_price / avg_price price_volatility_ratio
-      FROM pair_history h
-        JOIN pairs p ON h.pair_id = p.id
-      WHERE NOT p.is_blacklisted
-        AND h.created_at IN (
-          SELECT created_at
-          from updates
-        )
-    )
-    SELECT created_at dttm,
-      name,
-      pair_address,
-      bin_step,
-      base_fee_percentage,
-      price,
-      liquidity,
-      fees,
-      num_minutes,
-      avg_price,
-      cumulative_fees,
-      avg_liquidity,
-      liquidity_std_dev,
-      liquidity_volatility_ratio,
-      pct_geek_fees_liquidity,
-      pct_geek_fees_liquidity_24h,
-      stddev_samp(pct_geek_fees_liquidity_24h) OVER (
-        PARTITION BY pair_address
-        ORDER BY created_at
-      ) std_dev_pct_geek_fees_liquidity_24h,
-      std_dev_pct_geek_fees_liquidity_24h / pct_geek_fees_liquidity_24h pct_geek_fees_liquidity_24h_volatility_ratio,
-      num_minutes_with_volume,
-      pct_minutes_with_volume,
-      sum(tick_up) OVER (
-        PARTITION BY pair_address
-        ORDER BY created_at
-      ) num_tick_up,
-      sum(tick_down) OVER (
-        PARTITION BY pair_address
-        ORDER BY created_at
-      ) num_tick_down,
-      round(
-        100 * num_tick_up / (num_tick_up + num_tick_down)
-      ) pct_tick_up,
-      min_price,
-      max_price,
-      pct_price_range,
-      bins_range,
-      num_positions_range,
-      pct_below_max,
-      bins_below_max,
-      near_max,
-      std_dev_price,
-      price_volatility_ratio
-    FROM cumulative_stats
-    WHERE
-      pair_address = '{pair_address}'
-    ORDER BY
-      created_at
-  """
-  pair_details = conn.execute(query).fetchdf()
+def query_pair_details(pair_address, num_minutes):
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
+  pair_details = queries.get_pair_details(conn, pair_address, num_minutes, PAIR_DETAIL_COLUMNS)
   conn.close()
-  return pair_details
-
-def get_token_from_list(token_address, token_list):
+  return compact_frame(pair_details)
+
+def get_analytics(num_minutes):
+  return cached("analytics", query_analytics, num_minutes, spinner="Correlating pairs...")
+
+def query_analytics(num_minutes):
+  # The opportunity set is every pair in the summary of the timeframe
+  summary_data = get_summary_data(num_minutes)
+  pairs, history = query_opportunities(summary_data, num_minutes)
+  # Only the read is retried, so errors in the analysis surface right away
+  return analytics.analyze_history(pairs, history)
+
+@retry(
+  retry=retry_if_exception_type(duckdb.IOException),
+  stop=stop_after_attempt(10),
+  wait=wait_exponential(multiplier=1.1, min=0.1, max=5),
+  reraise=True,
+)
+def query_opportunities(summary_data, num_minutes):
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
   try:
-    return [
-      token_list[x] 
-      for x in range(len(token_list)) 
-      if token_list[x][1] == token_address
-    ][0]
-  except:
-    return None
+    return analytics.load_opportunities(conn, summary_data, num_minutes)
+  finally:
+    conn.close()
+
+def search_pairs(query):
+  index = get_search_index()
+  index.update(get_snapshot(), query_search_entries)
+  return index.search_frame(query)
+
+@sleep_and_retry
+@retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
+def query_search_entries(after_pair_id):
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
+  entries = queries.get_search_entries(conn, after_pair_id)
+  conn.close()
+  return entries
+
+def get_organic_score(mint):
+  return cached("organic_score", query_organic_score, mint)
+
+@sleep_and_retry
+@retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
+def query_organic_score(mint):
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
+  organic_score = queries.get_organic_score(conn, mint)
+  conn.close()
+  return organic_score
 
 @sleep_and_retry
 @retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
 @st.cache_data(show_spinner="Fetching pair details...")
 def get_token(pair_address):
-  conn = duckdb.connect(config.DB_FILENAME, read_only=True)
-  query = f"""
-    SELECT 
-      t.symbol, t.mint
-    FROM 
-      pairs p 
-      JOIN tokens t ON p.mint_x_id=t.id OR p.mint_y_id=t.id 
-    WHERE 
-      pair_address='{pair_address}'
-  """
-  results = conn.execute(query).fetchall()
-  mints = [result[1] for result in results]
+  conn = profiling.connect(config.DB_FILENAME, read_only=True)
+  token = queries.get_token(conn, pair_address)
   conn.close()
-  base_token_address = [
-    mint for mint in mints 
-    if mint not in [
-      'So11111111111111111111111111111111111111112',
-      'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',
-      'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB',
-    ]
-  ]
-  if (len(base_token_address) == 0):
-    if 'So11111111111111111111111111111111111111112' in mints:
-      return get_token_from_list('So11111111111111111111111111111111111111112', results)
-    if 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB' in mints:
-      return get_token_from_list('Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB', results)
-    return results[0]
-  return get_token_from_list(base_token_address[0], results)
+  return token
 
 def display_pair_detail_chart(pair_details):
-    # Ensure 'dttm' is in datetime format
-    pair_details['dttm'] = pd.to_datetime(pair_details['dttm'])
+    # Altair is only needed once a pair is selected, so it is not imported before the first render
+    import altair as alt
+
+    # Ensure 'dttm' is in datetime format, without mutating the shared cached frame
+    pair_details = pair_details.assign(dttm=pd.to_datetime(pair_details['dttm']))
 
     # Melt the DataFrame to combine the metrics into one column
     melted_pair_details = pair_details.melt(
@@ -466,8 +262,6 @@ def display_pair_detail_chart(pair_details):
       title='Liquidity and Avg Geek 24h Fee / TVL Over Time'
     )
 
-    # Ensure 'dttm' is in datetime format
-    pair_details['dttm'] = pd.to_datetime(pair_details['dttm'])
 
     # Melt the DataFrame to combine the metrics into one column
     melted_pair_details = pair_details.melt(
@@ -537,6 +331,47 @@ def display_pair_detail_chart(pair_details):
     with right_column:
       st.altair_chart(combined_chart_2, use_container_width=True)
 
+def display_cross_pair_analytics(num_minutes, pair_address):
+    pair_analytics = get_analytics(num_minutes)
+    related = analytics.related_pairs(pair_analytics, pair_address)
+    pair = pair_analytics["pairs"][pair_analytics["pairs"]["pair_address"] == pair_address]
+    if related.empty or pair.empty:
+      return
+
+    left_column, right_column = st.columns([1, 1])
+    with left_column:
+      st.write("Most correlated pairs")
+      columns = ["name", "bin_step", "correlation"]
+      # The rolling window only differs from the timeframe when it is shorter
+      if config.ANALYTICS_ROLLING_MINUTES < num_minutes:
+        columns.append("rolling_correlation")
+      st.dataframe(
+        related[columns],
+        hide_index=True,
+        column_config={
+          "name": "Pair Name",
+          "bin_step": "Bin Step",
+          "correlation": st.column_config.NumberColumn(TIMEFRAME_LABELS[num_minutes], format="%.2f"),
+          "rolling_correlation": st.column_config.NumberColumn(f"Last {config.ANALYTICS_ROLLING_MINUTES} minutes", format="%.2f"),
+        },
+      )
+
+    with right_column:
+      st.write("Token exposure across opportunities")
+      mints = [pair["base_mint"].iloc[0], pair["quote_mint"].iloc[0]]
+      tokens = pair_analytics["tokens"]
+      st.dataframe(
+        tokens[tokens["mint"].isin(mints)][["symbol", "num_pairs", "liquidity", "pct_liquidity", "volatility"]],
+        hide_index=True,
+        column_config={
+          "symbol": "Token",
+          "num_pairs": "Pairs",
+          "liquidity": st.column_config.NumberColumn("Liquidity", format="%.2f"),
+          "pct_liquidity": st.column_config.NumberColumn("% of Liquidity", format="%.2f"),
+          "volatility": st.column_config.NumberColumn("Volatility / Minute", format="%.4f"),
+        },
+      )
+
 def display_num_minutes_selectbox(update_count):
   options = [x for x in TIMEFRAMES if x <= update_count]
   left_column, _ = st.columns([1, 4])
@@ -553,18 +388,41 @@ def get_selected_pair_address(selected_row):
     pair_address = selected_row["pair_address"].iloc[0]
     return pair_address
   
-def refresh_data():
-  st.cache_data.clear()
-  update_count = get_update_count()
-  for num_minutes in TIMEFRAMES:
-    if update_count >= num_minutes:
-      get_summary_data(num_minutes)
-  st.rerun()
+@st.fragment(run_every=config.SNAPSHOT_CHECK_SECONDS)
+def watch_snapshot(snapshot):
+  # The collector publishes each snapshot by rewriting the prewarm manifest;
+  # rerun the page as soon as a newer one appears. Cached results are keyed
+  # on the snapshot, so only results for the new snapshot are computed.
+  if get_snapshot() != snapshot:
+    st.rerun()
+
+def display_search_results(query):
+  results = search_pairs(query)
+  if results.empty:
+    st.caption(f"No pairs match '{query}'.")
+    return None
+  selection = st.dataframe(
+    results[["name", "bin_step", "base_fee_percentage", "base_symbol", "quote_symbol", "pair_address"]],
+    hide_index=True,
+    on_select="rerun",
+    selection_mode="single-row",
+    key="search_results",
+    column_config={
+      "name": "Pair Name",
+      "bin_step": "Bin Step",
+      "base_fee_percentage": st.column_config.NumberColumn("Base Fee Percentage", format="%.2f"),
+      "base_symbol": "Base Token",
+      "quote_symbol": "Quote Token",
+      "pair_address": "Pair Address",
+    },
+  )
+  rows = selection.selection.rows
+  return results["pair_address"].iloc[rows[0]] if rows else None
 
 def save_filter_model(filter_model):
   st.session_state["filter_model"] = filter_model
 
-async def get_pair_data(get_pair_details, get_token, num_minutes, data, pair_address):
+def get_pair_data(get_pair_details, get_token, num_minutes, data, pair_address):
     pair = data[data["pair_address"] == pair_address].iloc[0]
     name = pair["name"]
     bin_step = pair["bin_step"]
@@ -574,7 +432,7 @@ async def get_pair_data(get_pair_details, get_token, num_minutes, data, pair_add
     bins_range = round(pair["bins_range"])
     token = get_token(pair_address)
     detail_df = get_pair_details(pair_address, num_minutes)
-    organic_score = await get_organic_score(token[1])
+    organic_score = get_organic_score(token[1])
     markdown = f"""
         <br/>
         <a href="https://app.meteora.ag/dlmm/{pair_address}" target="_blank">{name} {bin_step} Bin Step, {base_fee_percentage}% Base Fee</a>
@@ -589,10 +447,7 @@ async def get_pair_data(get_pair_details, get_token, num_minutes, data, pair_add
     return detail_df
 
 async def main():
-    if "data_refreshed" not in st.session_state:
-        st.session_state["data_refreshed"] = True
-        refresh_data()
-
+    watch_snapshot(get_snapshot())
     update_count = get_update_count()
 
     if update_count < 5:
@@ -626,7 +481,12 @@ async def main():
         left_column, right_column = st.columns([0.45, 0.55])
         grid_table = None
 
+        # Imported after the page header is sent, so it renders before the grid's dependencies load
+        from st_aggrid import AgGrid, GridUpdateMode, GridOptionsBuilder
+
         with left_column:
+            search_query = st.text_input("Search pairs", placeholder="Pair name, token symbol, mint or pair address").strip()
+            searched_pair_address = display_search_results(search_query) if search_query != "" else None
             st.write("Select a row to view Geek 24h Fee / TVL Chart")
             columns_to_display = [
                 "name", "bin_step", "base_fee_percentage", 
@@ -682,10 +542,14 @@ async def main():
                     save_filter_model({"filterModel": current_filter_model})
 
         with right_column:
-            pair_address = get_selected_pair_address(grid_table["selected_rows"])
-            if pair_address != None:
-                detail_df = await get_pair_data(get_pair_details, get_token, num_minutes, data, pair_address)
+            # A selected search result takes precedence over the grid selection
+            pair_address = searched_pair_address or get_selected_pair_address(grid_table["selected_rows"])
+            if pair_address != None and not (data["pair_address"] == pair_address).any():
+                st.write(f"The selected pair has no data in the {TIMEFRAME_LABELS[num_minutes]} timeframe.")
+            elif pair_address != None:
+                detail_df = get_pair_data(get_pair_details, get_token, num_minutes, data, pair_address)
                 display_pair_detail_chart(detail_df)
+                display_cross_pair_analytics(num_minutes, pair_address)
 
         # Show last update time
         last_update_time = data['dttm'].max()
@@ -697,8 +561,12 @@ async def main():
 
     if update_count >= 5 and minutes_ago >= 0:
         st.write(f"Collected {update_count} minutes of data, updated {minutes_ago} minute{'s' if minutes_ago != 1 else ''} ago")
+        partial_snapshots = get_manifest()["partial_snapshots"].get(num_minutes, 0)
+        if partial_snapshots > 0:
+            st.caption(f"{partial_snapshots} of the last {num_minutes} snapshots are partial: some pages of pairs could not be fetched for those minutes.")
         if (minutes_ago >= 5):
-            if st.button("Refresh data"):
-                refresh_data()
+            st.caption("No new snapshot has been collected since. This page updates on its own when one is.")
+
+    write_dashboard_metrics()
 
 asyncio.run(main())
@@ -14,6 +14,9 @@ trap terminate SIGTERM SIGINT
 # Start load_database.py in the background
 python load_database.py &
 
+# Start the HTTP query API in the background
+python serve_api.py &
+
 # Start streamlit in the background
 streamlit run app.py --server.port=8501 --server.address=0.0.0.0 &
 
@@ -1,5 +1,9 @@
 import asyncio
-from meteora_project import load_database
+import logging
+from meteora_project import config
+from meteora_project.main import load_database
 
 if __name__ == "__main__":
+    # Configure logging (adjust level as needed)
+    logging.basicConfig(level=config.LOG_LEVEL)
     asyncio.run(load_database())
@@ -1,5 +1,23 @@
 # meteora_project/__init__.py
-from .apis import meteora_lp_api
-from .db import setup_database, insert_meteora_api_entries
-from .config import API_BASE_URL, DB_FILENAME
-from .main import load_database
\ No newline at end of file
+import importlib
+
+# The readers (dashboard, query API, backtests) only need config, queries and
+# the DuckDB helpers, so the collector and API clients are imported on first use
+_LAZY_ATTRIBUTES = {
+    "meteora_lp_api": ".apis.meteora_dlmm",
+    "setup_database": ".db",
+    "insert_meteora_api_entries": ".db",
+    "API_BASE_URL": ".config",
+    "DB_FILENAME": ".config",
+    "load_database": ".main",
+}
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
@@ -0,0 +1,197 @@
+# analytics.py
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from meteora_project import config
+from meteora_project.queries import get_pair_tokens, get_price_history
+
+logger = logging.getLogger(__name__)
+
+def price_matrix(history, pair_ids):
+    """
+    Aligns price history rows into a (snapshots x pairs) matrix, with the
+    columns in the order of 'pair_ids'. Minutes a pair is missing from carry
+    its previous price forward.
+    """
+    times, rows = np.unique(history["created_at"], return_inverse=True)
+    columns = pd.Index(pair_ids).get_indexer(history["pair_id"])
+    prices = np.full((len(times), len(pair_ids)), np.nan)
+    prices[rows, columns] = history["price"]
+    prices = pd.DataFrame(prices).ffill().to_numpy()
+    return times, prices
+
+def log_returns(prices):
+    """
+    Returns the minute over minute log returns of a price matrix. Minutes
+    without a valid price on both sides count as no change.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(prices), axis=0)
+    returns[~np.isfinite(returns)] = 0.0
+    return returns.astype(np.float32)
+
+def standardize(returns):
+    """
+    Centres each column and scales it to unit norm, so the dot product of two
+    columns is their Pearson correlation. Constant columns become zero.
+    """
+    centred = returns - returns.mean(axis=0, dtype=np.float64).astype(returns.dtype)
+    norms = np.sqrt(np.einsum("ij,ij->j", centred, centred, dtype=np.float64)).astype(returns.dtype)
+    norms[norms == 0] = np.inf
+    return centred / norms
+
+def correlation_matrix(returns, block_size=config.ANALYTICS_BLOCK_SIZE, workers=config.ANALYTICS_WORKERS):
+    """
+    Returns the correlation of every pair of columns of a returns matrix.
+
+    The matrix product is split into blocks of 'block_size' columns. Only the
+    blocks on and above the diagonal are computed, on a thread pool, since
+    NumPy releases the GIL while multiplying.
+    """
+    z = np.asfortranarray(standardize(returns))
+    num_columns = z.shape[1]
+    correlation = np.empty((num_columns, num_columns), dtype=z.dtype)
+    starts = range(0, num_columns, block_size)
+    blocks = [(i, j) for i in starts for j in starts if j >= i]
+
+    def multiply(block):
+        i, j = block
+        product = z[:, i:i + block_size].T @ z[:, j:j + block_size]
+        correlation[i:i + block_size, j:j + block_size] = product
+        if i != j:
+            correlation[j:j + block_size, i:i + block_size] = product.T
+
+    if workers > 1 and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(multiply, blocks))
+    else:
+        for block in blocks:
+            multiply(block)
+
+    # Rounding can push products of nearly identical columns past 1
+    np.clip(correlation, -1, 1, out=correlation)
+    return correlation
+
+def _window_sums(values, window):
+    """
+    Returns the sums of every 'window' consecutive rows.
+    """
+    cumulative = np.cumsum(values, axis=0, dtype=np.float64)
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), cumulative])
+    return cumulative[window:] - cumulative[:-window]
+
+def rolling_correlation(returns, target, columns, window=config.ANALYTICS_ROLLING_MINUTES):
+    """
+    Returns the correlation of column 'target' with each of 'columns' over every
+    trailing 'window' minutes, as a ((minutes - window + 1) x columns) matrix.
+    """
+    window = max(2, min(window, len(returns)))
+    x = returns[:, [target]].astype(np.float64)
+    y = returns[:, columns].astype(np.float64)
+    sum_x, sum_y = _window_sums(x, window), _window_sums(y, window)
+    covariance = _window_sums(x * y, window) - sum_x * sum_y / window
+    variance_x = _window_sums(x * x, window) - sum_x ** 2 / window
+    variance_y = _window_sums(y * y, window) - sum_y ** 2 / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.sqrt(variance_x * variance_y)
+    correlation[~np.isfinite(correlation)] = 0.0
+    return np.clip(correlation, -1, 1)
+
+def token_exposure(pairs, returns):
+    """
+    Aggregates the opportunity set by token: the pairs and liquidity exposed
+    to each token as base or quote, and the volatility of a liquidity weighted
+    index of the pairs it is the base token of.
+    """
+    liquidity = pairs["liquidity"].to_numpy(dtype=np.float64)
+    sides = pd.concat([
+        pd.DataFrame({"mint": pairs["base_mint"], "symbol": pairs["base_symbol"], "column": np.arange(len(pairs)), "base": True}),
+        pd.DataFrame({"mint": pairs["quote_mint"], "symbol": pairs["quote_symbol"], "column": np.arange(len(pairs)), "base": False}),
+    ], ignore_index=True).dropna(subset=["mint"])
+    mints, token_index = np.unique(sides["mint"].to_numpy(), return_inverse=True)
+    columns = sides["column"].to_numpy()
+    num_tokens = len(mints)
+
+    total_liquidity = np.bincount(token_index, weights=liquidity[columns], minlength=num_tokens)
+    num_pairs = np.bincount(token_index, minlength=num_tokens)
+
+    # Liquidity weights of each pair in the index of its base token
+    base = sides["base"].to_numpy()
+    weights = np.zeros((len(pairs), num_tokens), dtype=np.float32)
+    weights[columns[base], token_index[base]] = liquidity[columns[base]]
+    base_liquidity = weights.sum(axis=0)
+    weights /= np.where(base_liquidity > 0, base_liquidity, 1)
+    index_returns = returns @ weights
+
+    symbols = sides.groupby("mint")["symbol"].first().reindex(mints)
+    exposure = pd.DataFrame({
+        "mint": mints,
+        "symbol": symbols.to_numpy(),
+        "num_pairs": num_pairs,
+        "liquidity": total_liquidity,
+        "pct_liquidity": 100 * total_liquidity / max(liquidity.sum(), 1e-12),
+        "volatility": np.where(base_liquidity > 0, index_returns.std(axis=0), np.nan),
+    })
+    return exposure.sort_values("liquidity", ascending=False, ignore_index=True)
+
+def load_opportunities(conn, summary_data, num_minutes):
+    """
+    Reads the tokens and the price history of an opportunity set (the pairs of
+    a summary) over the last 'num_minutes'.
+    """
+    pairs = get_pair_tokens(conn, summary_data["pair_address"].tolist())
+    pairs = pairs.merge(summary_data[["pair_address", "liquidity"]], on="pair_address")
+    history = get_price_history(conn, pairs["pair_id"], num_minutes)
+    return pairs, history
+
+def analyze_history(pairs, history):
+    """
+    Builds the cross pair analytics of an opportunity set from its price
+    history: the aligned returns matrix, the correlation of every pair of
+    pairs, and the exposure to each token.
+    """
+    start_time = time.perf_counter()
+    times, prices = price_matrix(history, pairs["pair_id"])
+    returns = log_returns(prices)
+    correlation = correlation_matrix(returns)
+    tokens = token_exposure(pairs, returns)
+    logger.debug(
+        "Analyzed %d pairs over %d minutes in %.2f seconds",
+        len(pairs), len(times), time.perf_counter() - start_time
+    )
+    return {
+        "pairs": pairs,
+        "times": times,
+        "returns": returns,
+        "correlation": correlation,
+        "tokens": tokens,
+    }
+
+def analyze_opportunities(conn, summary_data, num_minutes):
+    """
+    Builds the cross pair analytics of an opportunity set over the last 'num_minutes'.
+    """
+    return analyze_history(*load_opportunities(conn, summary_data, num_minutes))
+
+def related_pairs(analytics, pair_address, top=10, window=config.ANALYTICS_ROLLING_MINUTES):
+    """
+    Returns the pairs most correlated with a pair, with their correlation over
+    the whole timeframe and over the last 'window' minutes.
+    """
+    pairs = analytics["pairs"]
+    matches = np.flatnonzero(pairs["pair_address"].to_numpy() == pair_address)
+    if len(matches) == 0:
+        return pairs.iloc[0:0].assign(correlation=[], rolling_correlation=[])
+    target = matches[0]
+    correlation = analytics["correlation"][target].astype(np.float64)
+    strength = np.abs(correlation)
+    strength[target] = -1
+    order = np.argsort(-strength)[:min(top, len(pairs) - 1)]
+    rolling = rolling_correlation(analytics["returns"], target, order, window)
+    return pairs.iloc[order].assign(
+        correlation=correlation[order],
+        rolling_correlation=rolling[-1] if len(rolling) else np.nan,
+    ).reset_index(drop=True)
@@ -1,2 +1,21 @@
-from .meteora_dlmm import meteora_lp_api
-from .jupiter import get_organic_score
\ No newline at end of file
+# meteora_project/apis/__init__.py
+import importlib
+
+# Each client pulls in aiohttp and tenacity, so they are imported on first use
+_LAZY_ATTRIBUTES = {
+    "crawl_pairs": ".meteora_dlmm",
+    "fetch_pairs": ".meteora_dlmm",
+    "meteora_lp_api": ".meteora_dlmm",
+    "get_organic_score": ".jupiter",
+    "get_organic_scores": ".jupiter",
+}
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
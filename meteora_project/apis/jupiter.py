@@ -1,35 +1,56 @@
-import requests
-import json
 import asyncio
 import aiohttp
 from datetime import datetime, timezone
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
-from ratelimit import limits, sleep_and_retry
 from meteora_project import config
+from meteora_project.budget import get_budget
 
-logging.basicConfig(level=config.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-# Retrieve the specific rate limit for the Meteora DLMM API
-meteora_rate = config.RATE_LIMITS.get("meteora_dlmm", {"calls": 3, "period": 1})
-calls = meteora_rate["calls"]
-period = meteora_rate["period"]
+# Retrieve the specific rate limit for the Jupiter API
+jupiter_rate = config.RATE_LIMITS.get("jupiter", {"calls": 3, "period": 1})
+calls = jupiter_rate["calls"]
+period = jupiter_rate["period"]
+
+# Shared with every other process calling the Jupiter API
+budget = get_budget("jupiter")
 
-@sleep_and_retry
-@limits(calls=calls, period=period)
 @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
-async def get_organic_score(token_ca):
+async def get_organic_score(session, token_ca):
     """
     Get the organic score for a token
     """
+    await budget.acquire()
     endpoint = f"/tokens/search?query={token_ca}"
     url = config.JUPITER_API_BASE_URL + endpoint
+    async with session.get(url, timeout=10) as response:
+      response.raise_for_status()  # Will trigger retry if status is not 200
+      result = await response.json()
+      try:
+        return round(float(result["tokens"][0]["organicScore"]))
+      except:
+        return None
+
+async def get_organic_scores(token_cas):
+    """
+    Gets the organic scores for a list of tokens over one pooled session,
+    returning a dict of token address to score. Tokens that fail are left out.
+    """
+    scores = {}
+
     async with aiohttp.ClientSession() as session:
-      async with session.get(url, timeout=10) as response:
-        response.raise_for_status()  # Will trigger retry if status is not 200
-        result = await response.json()
-        try:
-          return round(float(result["tokens"][0]["organicScore"]))
-        except:
-          return None
\ No newline at end of file
+        for start in range(0, len(token_cas), calls):
+            # Fetch one rate limit window of tokens at a time
+            batch = token_cas[start:start + calls]
+            responses = await asyncio.gather(
+                *[get_organic_score(session, token_ca) for token_ca in batch],
+                return_exceptions=True
+            )
+            for token_ca, score in zip(batch, responses):
+                if isinstance(score, Exception):
+                    logger.warning("Failed to fetch organic score for %s: %s", token_ca, score)
+                    continue
+                scores[token_ca] = score
+
+    return scores
@@ -1,68 +1,209 @@
-import requests
-import json
 import asyncio
 import aiohttp
 from datetime import datetime, timezone
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
-from ratelimit import limits, sleep_and_retry
-from meteora_project import config
+from meteora_project import config, metrics
+from meteora_project.budget import PRIORITY_CRAWL, PRIORITY_HOT, get_budget
 
-logging.basicConfig(level=config.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+API_REQUEST_SECONDS = metrics.histogram("meteora_api_request_seconds", "Latency of Meteora API requests", ["endpoint"])
+API_REQUESTS = metrics.counter("meteora_api_requests_total", "Meteora API requests by outcome", ["endpoint", "status"])
+API_RETRIES = metrics.counter("meteora_api_retries_total", "Meteora API requests retried after a failure", ["endpoint"])
+API_RATE_LIMIT_WAIT = metrics.counter("meteora_api_rate_limit_wait_seconds_total", "Time spent waiting on the Meteora API rate limiter", ["endpoint"])
+
 # Retrieve the specific rate limit for the Meteora DLMM API
 meteora_rate = config.RATE_LIMITS.get("meteora_dlmm", {"calls": 3, "period": 1})
 calls = meteora_rate["calls"]
 period = meteora_rate["period"]
 
-@sleep_and_retry
-@limits(calls=calls, period=period)
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
+# The crawl and the hot tier share one budget, with the hot tier served first,
+# and every other process calling the Meteora API draws from it too
+budget = get_budget("meteora_dlmm")
+
+async def get_json(session, endpoint, url, priority):
+    """
+    Waits for a slot in the shared Meteora rate budget, then fetches a JSON response.
+    """
+    API_RATE_LIMIT_WAIT.inc(await budget.acquire(priority), endpoint=endpoint)
+    with API_REQUEST_SECONDS.time(endpoint=endpoint):
+        try:
+            async with session.get(url, timeout=10) as response:
+                response.raise_for_status()  # Will trigger retry if status is not 200
+                data = await response.json()
+        except Exception:
+            API_REQUESTS.inc(endpoint=endpoint, status="error")
+            raise
+    API_REQUESTS.inc(endpoint=endpoint, status="ok")
+    return data
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    before_sleep=lambda retry_state: API_RETRIES.inc(endpoint="all_with_pagination"),
+)
 async def fetch_page_data(session, page, limit, sort_key):
     """
     Helper function to fetch a single page of data from the Meteora API.
     """
     endpoint = f"/pair/all_with_pagination?page={page}&limit={limit}&sort_key={sort_key}"
     url = config.API_BASE_URL + endpoint
-    async with session.get(url, timeout=10) as response:
-        response.raise_for_status()  # Will trigger retry if status is not 200
-        return await response.json()
+    return await get_json(session, "all_with_pagination", url, PRIORITY_CRAWL)
+
+@retry(
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=1, min=1, max=2),
+    before_sleep=lambda retry_state: API_RETRIES.inc(endpoint="pair"),
+)
+async def fetch_pair(session, pair_address, priority=PRIORITY_HOT):
+    """
+    Fetches a single pair from the Meteora API, by default ahead of the paginated crawl.
+    """
+    url = config.API_BASE_URL + f"/pair/{pair_address}"
+    return await get_json(session, "pair", url, priority)
+
+async def fetch_pairs(pair_addresses, priority=PRIORITY_HOT):
+    """
+    Fetches a list of pairs concurrently over one session. Pairs that fail are left out.
+    """
+    async with aiohttp.ClientSession() as session:
+        responses = await asyncio.gather(
+            *[fetch_pair(session, pair_address, priority) for pair_address in pair_addresses],
+            return_exceptions=True
+        )
+    results = []
+    for pair_address, data in zip(pair_addresses, responses):
+        if isinstance(data, Exception):
+            logger.warning("Failed to fetch pair %s: %s", pair_address, data)
+            continue
+        results.append(data)
+    return results
+
+def is_active(pair):
+    """
+    Returns whether a pair had fees in the last 30 minutes.
+    """
+    return pair.get('fees', {}).get('min_30', 0) != 0
+
+def active_addresses(pairs):
+    """
+    Returns the addresses of the pairs that had fees in the last 30 minutes.
+    """
+    return [pair['address'] for pair in pairs if is_active(pair)]
+
+def is_last_page(data, page, limit):
+    """
+    Returns whether a page ends the crawl: it has a pair with no fees in the last
+    30 minutes, it is not full, or it reaches the total number of pairs.
+    """
+    pairs = data.get('pairs', [])
+    total = data.get('total')
+    return (
+        any(not is_active(pair) for pair in pairs)
+        or len(pairs) < limit
+        or (total is not None and (page + 1) * limit >= total)
+    )
+
+async def fetch_pages(session, pages, limit, sort_key):
+    """
+    Fetches pages concurrently, returning a dict of page number to response or exception.
+    """
+    responses = await asyncio.gather(
+        *[fetch_page_data(session, page, limit, sort_key) for page in pages],
+        return_exceptions=True
+    )
+    return dict(zip(pages, responses))
 
 async def fetch_paginated_data(limit=config.DEFAULT_LIMIT, sort_key="volume"):
     """
     Handles pagination, looping through pages and aggregating results from the Meteora API.
+
+    Pages are kept as they arrive, so a page that still fails after its retries
+    does not throw away the rest of the crawl. Failed pages are fetched again on
+    their own once the end of the crawl is found. Returns the pairs, without
+    duplicates, and a report of the crawl.
     """
+    pages = {}
+    failed_pages = set()
+    last_page = None
     page = 0
-    results = []
 
     async with aiohttp.ClientSession() as session:
-        while True:
-            # Create a list of fetch requests
-            fetches = [fetch_page_data(session, n+page, limit, sort_key) for n in range(calls)]
-
-            # Gather the responses from the fetch requests
-            responses = await asyncio.gather(*fetches)
-            logger.debug(f"Received {(page+calls)*limit} pairs.")
-
-            # Loop through the responses and append the data to the results
-            for data in responses:            
-                # Collect the pairs from the response
-                pairs = data.get('pairs', [])
-                results.extend(pairs)
-                
-            # Check for the stopping condition: if any pair has volume.min_30 == 0
-            if any(pair['fees']['min_30'] == 0 for pair in pairs):
-                logger.debug("Found pair with zero volume in the last 30 minutes. Stopping.")
+        while last_page is None:
+            batch = list(range(page, page + calls))
+            responses = await fetch_pages(session, batch, limit, sort_key)
+            for n, data in responses.items():
+                if isinstance(data, Exception):
+                    logger.warning("Failed to fetch page %d: %s", n, data)
+                    failed_pages.add(n)
+                    continue
+                pages[n] = data.get('pairs', [])
+                if is_last_page(data, n, limit):
+                    last_page = n if last_page is None else min(last_page, n)
+            logger.debug(f"Received {sum(len(pairs) for pairs in pages.values())} pairs.")
+
+            if all(isinstance(data, Exception) for data in responses.values()):
+                # The API is unavailable, keep what was fetched so far
+                logger.error("Every page from %d to %d failed, stopping the crawl.", batch[0], batch[-1])
                 break
-            
+
             # Update the page number for pagination
             page += calls
 
-            # Sleep to respect the rate limit if necessary
-            # await asyncio.sleep(period)
+        if last_page is not None:
+            failed_pages = {n for n in failed_pages if n < last_page}
+            for n in [n for n in pages if n > last_page]:
+                del pages[n]
 
-    return results
+        # Retry only the pages that failed
+        for _ in range(config.PAGE_RETRY_ROUNDS):
+            if not failed_pages:
+                break
+            for n, data in (await fetch_pages(session, sorted(failed_pages), limit, sort_key)).items():
+                if not isinstance(data, Exception):
+                    pages[n] = data.get('pairs', [])
+                    failed_pages.discard(n)
+
+    # Pairs shift between pages while the crawl runs, so keep the first copy of each
+    results = {}
+    num_pairs = 0
+    for n in sorted(pages):
+        for pair in pages[n]:
+            num_pairs += 1
+            results.setdefault(pair['address'], pair)
+
+    report = {
+        "pages": len(pages),
+        "failed_pages": len(failed_pages),
+        "duplicates": num_pairs - len(results),
+        "complete": last_page is not None and not failed_pages,
+    }
+    if failed_pages:
+        logger.warning("Pages %s could not be fetched, the snapshot is partial.", sorted(failed_pages))
+    return list(results.values()), report
+
+async def crawl_pairs(previous_addresses=(), limit=config.DEFAULT_LIMIT, sort_key="volume"):
+    """
+    Crawls every active pair, then fetches the pairs that were active in the
+    previous snapshot but were not seen this time, which happens when pairs move
+    between pages during the crawl. Returns the pairs and a report of the crawl.
+    """
+    results, report = await fetch_paginated_data(limit=limit, sort_key=sort_key)
+
+    seen = {pair['address'] for pair in results}
+    missing = [address for address in previous_addresses if address not in seen]
+    report["missing"] = len(missing)
+    report["gap_filled"] = 0
+    if missing:
+        filled = await fetch_pairs(missing[:config.GAP_FILL_MAX_PAIRS], priority=PRIORITY_CRAWL)
+        # Pairs that went inactive since the previous snapshot stay out, as in the crawl
+        filled = [pair for pair in filled if is_active(pair)]
+        results.extend(filled)
+        report["gap_filled"] = len(filled)
+        logger.debug("Filled %d of %d pairs missing from the crawl.", len(filled), len(missing))
+
+    return results, report
 
 async def meteora_lp_api(limit=config.DEFAULT_LIMIT, sort_key="volume"):
     """
@@ -70,6 +211,6 @@ async def meteora_lp_api(limit=config.DEFAULT_LIMIT, sort_key="volume"):
     The function delegates pagination logic to fetch_paginated_data.
     """
     # Start the data aggregation process using pagination
-    results = await fetch_paginated_data(limit=limit, sort_key=sort_key)
+    results, _ = await fetch_paginated_data(limit=limit, sort_key=sort_key)
 
-    return results
\ No newline at end of file
+    return results
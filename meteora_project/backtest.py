@@ -0,0 +1,370 @@
+# backtest.py
+
+import itertools
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import duckdb
+import numpy as np
+import pandas as pd
+from meteora_project import config
+from meteora_project.db import connect_for_write, setup_backtest_tables
+
+logger = logging.getLogger(__name__)
+
+# Parameter grid swept by default. Every combination is simulated on every pair.
+#   range_bins:       total width of the position in bins, centred on the entry price
+#   lookback:         minutes of history used for the Geek 24h Fee / TVL signal
+#   entry_threshold:  minimum signal (%) required to open a position
+#   exit_threshold:   the position is closed when the signal falls below this (%)
+#   max_out_of_range: minutes the price may stay outside the range before closing
+DEFAULT_PARAMETER_GRID = {
+    "range_bins": [10, 34, 69, 138],
+    "lookback": [15, 30, 60],
+    "entry_threshold": [0, 25, 50, 100, 200],
+    "exit_threshold": [0, 10, 25],
+    "max_out_of_range": [0, 5, 30],
+}
+
+RESULT_COLUMNS = [
+    "fees_earned",
+    "pnl",
+    "pct_return",
+    "minutes_in_position",
+    "minutes_in_range",
+    "num_entries",
+]
+
+def build_parameter_grid(grid=None):
+    """
+    Expands a dict of parameter lists into a DataFrame with one row per combination.
+    """
+    grid = grid or DEFAULT_PARAMETER_GRID
+    keys = list(DEFAULT_PARAMETER_GRID.keys())
+    missing = [key for key in keys if key not in grid]
+    if missing:
+        raise ValueError(f"Parameter grid is missing: {', '.join(missing)}")
+    if any(lookback < 1 for lookback in grid["lookback"]):
+        raise ValueError("Parameter 'lookback' must be at least 1 minute")
+    combos = pd.DataFrame(list(itertools.product(*[grid[key] for key in keys])), columns=keys)
+    combos.insert(0, "combo_id", np.arange(len(combos)))
+    return combos
+
+def load_history_matrices(conn, num_minutes=None):
+    """
+    Loads 'pair_history' as dense pairs x minutes matrices aligned on snapshot time.
+
+    Minutes where a pair was not captured are NaN. Prices are forward filled so a
+    position can still be valued, and the 'present' mask records real observations.
+    """
+    limit = f"LIMIT {int(num_minutes)}" if num_minutes else ""
+    history = conn.execute(f'''
+        WITH updates AS (
+            SELECT DISTINCT created_at
+            FROM pair_history
+            ORDER BY created_at DESC
+            {limit}
+        )
+        SELECT
+            h.created_at,
+            p.pair_address,
+            p.bin_step,
+            h.price,
+            h.liquidity,
+            coalesce(h.fees, 0) fees
+        FROM
+            pair_history h
+            JOIN pairs p ON h.pair_id = p.id
+        WHERE
+            NOT p.is_blacklisted
+            AND h.created_at IN (SELECT created_at FROM updates)
+    ''').fetchdf()
+
+    minutes, minute_idx = np.unique(history["created_at"].to_numpy(), return_inverse=True)
+    pair_idx, pair_addresses = pd.factorize(history["pair_address"])
+    shape = (len(pair_addresses), len(minutes))
+
+    price = np.full(shape, np.nan)
+    liquidity = np.full(shape, np.nan)
+    fees = np.zeros(shape)
+    price[pair_idx, minute_idx] = history["price"].to_numpy()
+    liquidity[pair_idx, minute_idx] = history["liquidity"].to_numpy()
+    fees[pair_idx, minute_idx] = history["fees"].to_numpy()
+    present = ~np.isnan(price)
+
+    bin_step = np.zeros(len(pair_addresses))
+    bin_step[pair_idx] = history["bin_step"].to_numpy()
+
+    return {
+        "pair_addresses": np.asarray(pair_addresses),
+        "minutes": minutes,
+        "bin_step": bin_step,
+        "price": _forward_fill(price),
+        "liquidity": np.nan_to_num(liquidity),
+        "fees": fees,
+        "present": present,
+    }
+
+def _forward_fill(matrix):
+    """
+    Forward fills NaNs along the time axis, back filling any leading gap.
+    """
+    if matrix.size == 0:
+        return matrix
+    rows = np.arange(matrix.shape[0])
+    idx = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = matrix[rows[:, None], idx]
+    first_valid = matrix[rows, np.argmax(~np.isnan(matrix), axis=1)]
+    return np.where(np.isnan(filled), first_valid[:, None], filled)
+
+def trailing_signal(fees, liquidity, present, lookback):
+    """
+    Computes the trailing Geek 24h Fee / TVL (%) for every pair and minute.
+
+    Mirrors the dashboard metric: fees over the window divided by the average
+    liquidity plus its sample standard deviation, scaled to 24 hours.
+    """
+    def window_sum(values):
+        cumsum = np.cumsum(values, axis=1)
+        shifted = np.zeros_like(cumsum)
+        shifted[:, lookback:] = cumsum[:, :-lookback]
+        return cumsum - shifted
+
+    count = window_sum(present.astype(float))
+    sum_fees = window_sum(fees)
+    sum_liquidity = window_sum(liquidity)
+    sum_liquidity_sq = window_sum(liquidity ** 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_liquidity = sum_liquidity / count
+        variance = (sum_liquidity_sq - count * avg_liquidity ** 2) / (count - 1)
+        std_liquidity = np.sqrt(np.clip(variance, 0, None))
+        signal = 100 * sum_fees / (avg_liquidity + std_liquidity) * 1440 / count
+
+    # Require 90% of the window to be observed, as the dashboard does
+    signal[count < 0.9 * lookback] = np.nan
+    return np.nan_to_num(signal, nan=-np.inf, posinf=-np.inf)
+
+def _position_value(price, lower, upper, units):
+    """
+    Values a position spread uniformly over the price range [lower, upper].
+
+    Uses the continuous concentrated-liquidity approximation of a DLMM bin range,
+    returning the value in quote terms for 'units' of liquidity.
+    """
+    sqrt_lower = np.sqrt(lower)
+    sqrt_upper = np.sqrt(upper)
+    sqrt_price = np.clip(np.sqrt(price), sqrt_lower, sqrt_upper)
+    base_amount = units * (1 / sqrt_price - 1 / sqrt_upper)
+    quote_amount = units * (sqrt_price - sqrt_lower)
+    return base_amount * price + quote_amount
+
+def simulate_chunk(chunk, combos, capital=config.BACKTEST_CAPITAL):
+    """
+    Simulates every parameter combination on a chunk of pairs.
+
+    State is held in (pairs x combos) arrays so each minute is a handful of
+    vectorized NumPy operations, regardless of the size of the grid.
+    """
+    price = chunk["price"]
+    liquidity = chunk["liquidity"]
+    fees = chunk["fees"]
+    present = chunk["present"]
+    num_pairs, num_minutes = price.shape
+
+    lookbacks = np.unique(combos["lookback"].to_numpy())
+    signals = np.stack([trailing_signal(fees, liquidity, present, lookback) for lookback in lookbacks])
+    lookback_idx = np.searchsorted(lookbacks, combos["lookback"].to_numpy())
+
+    entry_threshold = combos["entry_threshold"].to_numpy(dtype=float)[None, :]
+    exit_threshold = combos["exit_threshold"].to_numpy(dtype=float)[None, :]
+    max_out_of_range = combos["max_out_of_range"].to_numpy()[None, :]
+    half_width = (1 + chunk["bin_step"][:, None] / 10000.0) ** (combos["range_bins"].to_numpy()[None, :] / 2)
+
+    shape = (num_pairs, len(combos))
+    in_position = np.zeros(shape, dtype=bool)
+    lower = np.ones(shape)
+    upper = np.ones(shape)
+    units = np.zeros(shape)
+    out_of_range = np.zeros(shape, dtype=np.int32)
+    fees_earned = np.zeros(shape)
+    pnl = np.zeros(shape)
+    minutes_in_position = np.zeros(shape, dtype=np.int32)
+    minutes_in_range = np.zeros(shape, dtype=np.int32)
+    num_entries = np.zeros(shape, dtype=np.int32)
+
+    for t in range(num_minutes):
+        current_price = price[:, t][:, None]
+        signal = signals[:, :, t].T[:, lookback_idx]
+        observed = present[:, t][:, None]
+
+        # Accrue fees on open positions, proportional to our share of the liquidity
+        in_range = in_position & (current_price >= lower) & (current_price <= upper)
+        fee_share = capital / (liquidity[:, t] + capital)
+        fees_earned += np.where(in_range & observed, (fees[:, t] * fee_share)[:, None], 0)
+        minutes_in_position += in_position
+        minutes_in_range += in_range
+        out_of_range = np.where(in_position & ~in_range, out_of_range + 1, 0)
+
+        # Close positions that left their range for too long or lost their edge
+        exits = in_position & observed & ((out_of_range > max_out_of_range) | (signal < exit_threshold))
+        if exits.any():
+            value = _position_value(current_price, lower, upper, units)
+            pnl += np.where(exits, value - capital, 0)
+            in_position &= ~exits
+
+        # Open new positions centred on the current price, never re-entering on an exit
+        entries = ~in_position & ~exits & observed & (signal >= entry_threshold)
+        if entries.any():
+            new_lower = current_price / half_width
+            new_upper = current_price * half_width
+            unit_value = _position_value(current_price, new_lower, new_upper, 1.0)
+            lower = np.where(entries, new_lower, lower)
+            upper = np.where(entries, new_upper, upper)
+            units = np.where(entries, capital / unit_value, units)
+            out_of_range = np.where(entries, 0, out_of_range)
+            num_entries += entries
+            in_position |= entries
+
+    # Mark any open positions to market at the final price
+    final_value = _position_value(price[:, -1][:, None], lower, upper, units)
+    pnl += np.where(in_position, final_value - capital, 0)
+    pnl += fees_earned
+
+    return {
+        "fees_earned": fees_earned,
+        "pnl": pnl,
+        "pct_return": 100 * pnl / capital,
+        "minutes_in_position": minutes_in_position,
+        "minutes_in_range": minutes_in_range,
+        "num_entries": num_entries,
+    }
+
+def _split_chunks(matrices, chunk_size):
+    """
+    Splits the pair matrices into chunks of at most 'chunk_size' pairs.
+    """
+    num_pairs = len(matrices["pair_addresses"])
+    for start in range(0, num_pairs, chunk_size):
+        stop = min(start + chunk_size, num_pairs)
+        yield {
+            key: (value if key == "minutes" else value[start:stop])
+            for key, value in matrices.items()
+        }
+
+def _results_frame(chunk, combos, results):
+    """
+    Flattens the (pairs x combos) result arrays of a chunk into a long DataFrame.
+    """
+    num_pairs = len(chunk["pair_addresses"])
+    frame = pd.DataFrame({
+        "pair_address": np.repeat(chunk["pair_addresses"], len(combos)),
+        "combo_id": np.tile(combos["combo_id"].to_numpy(), num_pairs),
+    })
+    for column in RESULT_COLUMNS:
+        frame[column] = results[column].ravel()
+    return frame
+
+def _run_chunk(args):
+    """
+    Process pool entry point for a single chunk.
+    """
+    chunk, combos, capital = args
+    return _results_frame(chunk, combos, simulate_chunk(chunk, combos, capital))
+
+def run_backtest(matrices, combos, capital=config.BACKTEST_CAPITAL, workers=config.BACKTEST_WORKERS, chunk_size=config.BACKTEST_CHUNK_SIZE):
+    """
+    Simulates every parameter combination on every pair, in parallel over pair chunks.
+    """
+    chunks = [(chunk, combos, capital) for chunk in _split_chunks(matrices, chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        frames = [_run_chunk(args) for args in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            frames = list(executor.map(_run_chunk, chunks))
+    if not frames:
+        return pd.DataFrame(columns=["pair_address", "combo_id"] + RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def save_backtest(conn, matrices, combos, results, capital):
+    """
+    Stores a backtest run, its parameter grid and per pair results in DuckDB.
+    """
+    run_id = conn.execute("SELECT nextval('backtest_runs_id_seq')").fetchone()[0]
+    minutes = matrices["minutes"]
+    conn.execute('''
+        INSERT INTO backtest_runs (id, created_at, start_at, end_at, num_minutes, num_pairs, num_combos, capital)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        run_id,
+        datetime.now(),
+        pd.Timestamp(minutes[0]).to_pydatetime() if len(minutes) else None,
+        pd.Timestamp(minutes[-1]).to_pydatetime() if len(minutes) else None,
+        len(minutes),
+        len(matrices["pair_addresses"]),
+        len(combos),
+        capital,
+    ])
+
+    backtest_params = combos.assign(run_id=run_id)
+    conn.register('backtest_params_df', backtest_params)
+    conn.execute('''
+        INSERT INTO backtest_params
+        SELECT run_id, combo_id, range_bins, lookback, entry_threshold, exit_threshold, max_out_of_range
+        FROM backtest_params_df
+    ''')
+    conn.unregister('backtest_params_df')
+
+    backtest_results = results.assign(run_id=run_id)
+    conn.register('backtest_results_df', backtest_results)
+    conn.execute('''
+        INSERT INTO backtest_results
+        SELECT
+            r.run_id,
+            r.combo_id,
+            p.id pair_id,
+            r.fees_earned,
+            r.pnl,
+            r.pct_return,
+            r.minutes_in_position,
+            r.minutes_in_range,
+            r.num_entries
+        FROM
+            backtest_results_df r
+            JOIN pairs p ON r.pair_address = p.pair_address
+    ''')
+    conn.unregister('backtest_results_df')
+    conn.commit()
+    return run_id
+
+def backtest(db_name=config.DB_FILENAME, num_minutes=None, grid=None, capital=config.BACKTEST_CAPITAL, workers=config.BACKTEST_WORKERS, chunk_size=config.BACKTEST_CHUNK_SIZE):
+    """
+    Loads the stored history, sweeps the parameter grid and writes the results back.
+    Returns the id of the new backtest run, or None when there is no history yet.
+    """
+    combos = build_parameter_grid(grid)
+
+    conn = duckdb.connect(db_name, read_only=True)
+    start_time = time.time()
+    matrices = load_history_matrices(conn, num_minutes)
+    conn.close()
+    num_pairs, num_steps = matrices["price"].shape
+    logger.info("Loaded %d pairs x %d minutes in %.2f seconds", num_pairs, num_steps, time.time() - start_time)
+    if num_pairs == 0 or num_steps == 0:
+        logger.warning("No pair history to backtest.")
+        return None
+
+    start_time = time.time()
+    results = run_backtest(matrices, combos, capital, workers, chunk_size)
+    logger.info("Simulated %d parameter combinations in %.2f seconds", len(combos), time.time() - start_time)
+
+    conn = connect_for_write(db_name)
+    try:
+        setup_backtest_tables(conn)
+        run_id = save_backtest(conn, matrices, combos, results, capital)
+    finally:
+        conn.close()
+    logger.info("Backtest run %d saved.", run_id)
+    return run_id
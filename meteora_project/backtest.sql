@@ -0,0 +1,33 @@
+CREATE SEQUENCE IF NOT EXISTS backtest_runs_id_seq;
+CREATE TABLE IF NOT EXISTS backtest_runs (
+  id INTEGER DEFAULT nextval('backtest_runs_id_seq') PRIMARY KEY,
+  created_at TIMESTAMP NOT NULL,
+  start_at TIMESTAMP,
+  end_at TIMESTAMP,
+  num_minutes INTEGER NOT NULL,
+  num_pairs INTEGER NOT NULL,
+  num_combos INTEGER NOT NULL,
+  capital FLOAT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS backtest_params (
+  run_id INTEGER NOT NULL REFERENCES backtest_runs(id),
+  combo_id INTEGER NOT NULL,
+  range_bins INTEGER NOT NULL,
+  lookback INTEGER NOT NULL,
+  entry_threshold FLOAT NOT NULL,
+  exit_threshold FLOAT NOT NULL,
+  max_out_of_range INTEGER NOT NULL,
+  PRIMARY KEY (run_id, combo_id)
+);
+CREATE TABLE IF NOT EXISTS backtest_results (
+  run_id INTEGER NOT NULL REFERENCES backtest_runs(id),
+  combo_id INTEGER NOT NULL,
+  pair_id INTEGER NOT NULL REFERENCES pairs(id),
+  fees_earned FLOAT NOT NULL,
+  pnl FLOAT NOT NULL,
+  pct_return FLOAT NOT NULL,
+  minutes_in_position INTEGER NOT NULL,
+  minutes_in_range INTEGER NOT NULL,
+  num_entries INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS backtest_results_run_id_combo_id_IDX ON backtest_results (run_id, combo_id);
@@ -0,0 +1,143 @@
+# budget.py
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import struct
+import time
+from meteora_project import config
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where each process keeps its own budget
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_HOT = 0
+PRIORITY_CRAWL = 1
+
+class LocalBucket:
+    """
+    Request slots of a rate limit, for a single process.
+
+    Slots are spaced evenly, 'period / calls' seconds apart, so no window of
+    'period' seconds ever holds more than 'calls' requests. Each reservation
+    pushes the time of the next free slot one interval ahead.
+    """
+
+    def __init__(self, calls, period):
+        self.interval = period / calls
+        self._next_free = 0.0
+
+    def _next_slot(self, next_free, now):
+        """
+        Returns the seconds until the next slot and the next free slot after reserving it.
+        """
+        start = max(next_free, now)
+        return start - now, start + self.interval
+
+    def reserve(self):
+        """
+        Reserves the next request slot, returning the seconds until it starts.
+        """
+        wait, self._next_free = self._next_slot(self._next_free, time.time())
+        return wait
+
+class SharedBucket(LocalBucket):
+    """
+    Request slots of a rate limit shared by every process on the host.
+
+    The next free slot lives in a small file locked with flock, so the
+    collector, enrichment and any other process draw from one budget and
+    are served in the order they reserved.
+    """
+
+    def __init__(self, calls, period, path):
+        super().__init__(calls, period)
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def reserve(self):
+        with open(self.path, "a+b") as state:
+            fcntl.flock(state, fcntl.LOCK_EX)
+            try:
+                state.seek(0)
+                raw = state.read(8)
+                next_free = struct.unpack("d", raw)[0] if len(raw) == 8 else 0.0
+                wait, next_free = self._next_slot(next_free, time.time())
+                state.seek(0)
+                state.truncate()
+                state.write(struct.pack("d", next_free))
+                state.flush()
+            finally:
+                fcntl.flock(state, fcntl.LOCK_UN)
+        return wait
+
+class RateBudget:
+    """
+    Async rate limiter shared by every caller of an API.
+
+    Callers wait without blocking the event loop. Within a process they are
+    served by priority, then in arrival order, so a high priority tier keeps
+    its cadence while lower priority work uses the rest of the budget. Each
+    process holds at most one reservation in the bucket at a time, which keeps
+    the processes sharing a bucket taking turns.
+    """
+
+    def __init__(self, calls, period, path=None):
+        self.calls = calls
+        self.period = period
+        if path is not None and fcntl is not None:
+            self._bucket = SharedBucket(calls, period, path)
+        else:
+            self._bucket = LocalBucket(calls, period)
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._pump_task = None
+
+    async def acquire(self, priority=PRIORITY_CRAWL):
+        """
+        Waits for a request slot, returning the number of seconds waited.
+        """
+        start_time = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._pump_task is None or self._pump_task.done() or self._pump_task.get_loop() is not loop:
+            self._pump_task = loop.create_task(self._pump())
+        await future
+        return time.perf_counter() - start_time
+
+    async def _pump(self):
+        """
+        Reserves slots while callers are waiting, granting each one to the
+        highest priority caller waiting when it starts.
+        """
+        while self._waiters:
+            wait = self._bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                # Skip callers that were cancelled while waiting
+                if not future.done():
+                    future.set_result(None)
+                    break
+
+_budgets = {}
+
+def get_budget(api, rate_limit_path=config.RATE_LIMIT_PATH):
+    """
+    Returns the rate budget of an API, as configured in RATE_LIMITS and shared
+    with the other processes through 'rate_limit_path'.
+    """
+    if api not in _budgets:
+        rate = config.RATE_LIMITS.get(api, {"calls": 3, "period": 1})
+        path = os.path.join(rate_limit_path, f"{api}.bucket")
+        _budgets[api] = RateBudget(rate["calls"], rate["period"], path)
+    return _budgets[api]
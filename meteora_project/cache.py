@@ -0,0 +1,166 @@
+# cache.py
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from meteora_project import config, metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = metrics.counter("result_cache_requests_total", "Result cache lookups by outcome", ["cache", "result"])
+CACHE_BYTES = metrics.gauge("result_cache_bytes", "Estimated memory used by the result cache", ["cache"])
+
+def estimate_size(value):
+    """
+    Estimates the memory used by a cached value, in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+def compact_column(column):
+    """
+    Returns a column with the smallest dtype that holds its values.
+    """
+    if isinstance(column.dtype, pd.ArrowDtype):
+        # Prewarmed results are Arrow backed; convert to the equivalent NumPy or string dtype first
+        if pd.api.types.is_string_dtype(column.dtype):
+            column = column.astype(pd.StringDtype("pyarrow"))
+        elif pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+            column = column.astype("float64" if column.hasnans else column.dtype.numpy_dtype)
+        else:
+            column = column.astype(column.dtype.numpy_dtype)
+
+    if pd.api.types.is_bool_dtype(column.dtype) or pd.api.types.infer_dtype(column, skipna=True) == "boolean":
+        # Booleans with missing values come back as objects
+        return column.fillna(False).astype(bool)
+    if pd.api.types.is_float_dtype(column.dtype):
+        if not column.hasnans and (column % 1 == 0).all():
+            return pd.to_numeric(column.astype("int64"), downcast="integer")
+        # Only downcasts to float32 when every value round trips exactly;
+        # to_numeric's own check is approximate and would round prices and fees
+        down = pd.to_numeric(column, downcast="float")
+        if np.array_equal(down.to_numpy(np.float64), column.to_numpy(np.float64), equal_nan=True):
+            return down
+        return column
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return pd.to_numeric(column, downcast="integer")
+    if pd.api.types.is_string_dtype(column.dtype) and not pd.api.types.is_datetime64_any_dtype(column.dtype):
+        # Repeated values, like pair names, are stored once as categories
+        if column.nunique() <= len(column) // 2:
+            return column.astype("category")
+        return column.astype(pd.StringDtype("pyarrow"))
+    return column
+
+def compact_frame(df, columns=None):
+    """
+    Returns the requested columns of a query result with compact dtypes: small
+    integers, float32 where it is exact enough, and Arrow backed or categorical strings.
+    """
+    if columns is not None:
+        df = df[[column for column in columns if column in df.columns]]
+    compact = pd.DataFrame({name: compact_column(column) for name, column in df.items()}, index=df.index)
+    logger.debug(
+        "Compacted a %d row result from %d to %d bytes.",
+        len(df), estimate_size(df), estimate_size(compact)
+    )
+    return compact
+
+class SnapshotCache:
+    """
+    Thread safe, memory bounded LRU cache of query results keyed on the snapshot
+    (latest 'pair_history.created_at') they were computed from.
+
+    Entries from older snapshots are dropped as soon as a newer snapshot is seen,
+    and concurrent requests for the same missing key wait for a single computation.
+    """
+
+    def __init__(self, max_bytes=config.RESULT_CACHE_MAX_MB * 1024 * 1024, name="default"):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.snapshot = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, snapshot, key, compute):
+        """
+        Returns the cached value for 'key' at 'snapshot', computing it at most once.
+        """
+        while True:
+            with self._lock:
+                if snapshot != self.snapshot:
+                    self._invalidate(snapshot)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                    return entry[0]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                    break
+            # Another thread is computing this key; wait and look again
+            pending.wait()
+
+        try:
+            value = compute()
+            with self._lock:
+                if snapshot == self.snapshot:
+                    self._store(key, value)
+                CACHE_BYTES.set(self.size, cache=self.name)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _invalidate(self, snapshot):
+        """
+        Drops every entry computed for a previous snapshot.
+        """
+        if self._entries:
+            logger.debug("New snapshot %s, dropping %d cached results.", snapshot, len(self._entries))
+        self._entries.clear()
+        self.size = 0
+        self.snapshot = snapshot
+
+    def _store(self, key, value):
+        """
+        Adds an entry, evicting the least recently used ones to stay within the memory bound.
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.warning("Result for %s (%d bytes) exceeds the cache limit, not caching.", key, size)
+            return
+        self._entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            logger.debug("Evicted %s from the result cache.", evicted_key)
@@ -20,10 +20,81 @@ if not os.path.exists(DB_PATH):
     os.makedirs(DB_PATH)
 DB_FILENAME = DB_PATH + "/" + os.getenv("DB_FILENAME", "meteora_dlmm_time_series.duckdb")
 
+# Directory for the prewarmed dashboard results
+PREWARM_PATH = os.getenv("PREWARM_PATH", DB_PATH + "/prewarm").rstrip('/')
+
+# Metrics Configuration
+METRICS_PATH = os.getenv("METRICS_PATH", DB_PATH + "/metrics").rstrip('/')
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+JOB_RUNS_RETENTION_DAYS = int(os.getenv("JOB_RUNS_RETENTION_DAYS", 7))
+
+# Slow Query Log Configuration
+# Queries slower than this are profiled and logged (0 disables profiling)
+QUERY_PROFILE_THRESHOLD_MS = float(os.getenv("QUERY_PROFILE_THRESHOLD_MS", 0))
+QUERY_PROFILE_PATH = os.getenv("QUERY_PROFILE_PATH", DB_PATH + "/profiles").rstrip('/')
+QUERY_PROFILE_MAX_FILES = int(os.getenv("QUERY_PROFILE_MAX_FILES", 1000))
+
 # Rate Limiting Configuration
+# Directory for the rate limit state shared by every process
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", DB_PATH + "/ratelimit").rstrip('/')
 RATE_LIMITS = {
     "meteora_dlmm": {
         "calls": int(os.getenv("RATE_LIMIT_CALLS", 3)),
         "period": int(os.getenv("RATE_LIMIT_PERIOD", 1))
+    },
+    "jupiter": {
+        "calls": int(os.getenv("JUPITER_RATE_LIMIT_CALLS", 3)),
+        "period": int(os.getenv("JUPITER_RATE_LIMIT_PERIOD", 1))
     }
 }
+
+# Quote Token Configuration
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+USDT_MINT = "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB"
+# Mints treated as the quote token of a pair, in priority order (most quote-like first)
+QUOTE_MINTS = [
+    mint.strip()
+    for mint in os.getenv("QUOTE_MINTS", ",".join([USDC_MINT, USDT_MINT, SOL_MINT])).split(",")
+    if mint.strip() != ""
+]
+
+# Polling Configuration
+CRAWL_INTERVAL_MINUTES = int(os.getenv("CRAWL_INTERVAL_MINUTES", 1))
+PAGE_RETRY_ROUNDS = int(os.getenv("PAGE_RETRY_ROUNDS", 2))
+GAP_FILL_MAX_PAIRS = int(os.getenv("GAP_FILL_MAX_PAIRS", 50))
+HOT_TIER_TOP_K = int(os.getenv("HOT_TIER_TOP_K", 20))
+HOT_TIER_TIMEFRAME = int(os.getenv("HOT_TIER_TIMEFRAME", 60))
+HOT_TIER_INTERVAL_SECONDS = int(os.getenv("HOT_TIER_INTERVAL_SECONDS", 15))
+# Pair addresses always polled by the hot tier, in addition to the top pairs
+HOT_TIER_WATCHLIST = [
+    address.strip()
+    for address in os.getenv("HOT_TIER_WATCHLIST", "").split(",")
+    if address.strip() != ""
+]
+HOT_HISTORY_RETENTION_HOURS = int(os.getenv("HOT_HISTORY_RETENTION_HOURS", 24))
+
+# Token Enrichment Configuration
+ORGANIC_SCORE_TTL = int(os.getenv("ORGANIC_SCORE_TTL", 6 * 60 * 60))
+ENRICH_INTERVAL_MINUTES = int(os.getenv("ENRICH_INTERVAL_MINUTES", 5))
+ENRICH_TOP_K = int(os.getenv("ENRICH_TOP_K", 100))
+ENRICH_TIMEFRAME = int(os.getenv("ENRICH_TIMEFRAME", 60))
+
+# Backtest Configuration
+BACKTEST_CAPITAL = float(os.getenv("BACKTEST_CAPITAL", 1000))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", os.cpu_count() or 1))
+BACKTEST_CHUNK_SIZE = int(os.getenv("BACKTEST_CHUNK_SIZE", 256))
+
+# Cross-Pair Analytics Configuration
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", os.cpu_count() or 1))
+ANALYTICS_BLOCK_SIZE = int(os.getenv("ANALYTICS_BLOCK_SIZE", 512))
+ANALYTICS_ROLLING_MINUTES = int(os.getenv("ANALYTICS_ROLLING_MINUTES", 60))
+
+# Dashboard Cache Configuration
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", 256))
+SNAPSHOT_CHECK_SECONDS = int(os.getenv("SNAPSHOT_CHECK_SECONDS", 5))
+
+# HTTP Query API Configuration
+QUERY_API_HOST = os.getenv("QUERY_API_HOST", "0.0.0.0")
+QUERY_API_PORT = int(os.getenv("QUERY_API_PORT", 8502))
@@ -1,26 +1,62 @@
 # db.py
 
 import os
+import threading
+import time
+from datetime import timedelta
 import duckdb
 import pandas as pd
 import logging
 from ratelimit import sleep_and_retry
-from tenacity import retry, wait_exponential
-from meteora_project import config
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from meteora_project import config, metrics, profiling
 
 logger = logging.getLogger(__name__)
 
+STAGE_SECONDS = metrics.histogram("collector_stage_seconds", "Duration of each stage of loading a snapshot", ["stage"])
+STAGE_ROWS = metrics.gauge("collector_stage_rows", "Rows processed by each stage of the last snapshot", ["stage"])
+
+# The crawl writer and the hot tier run in separate threads and both add new
+# tokens and pairs, so they take turns to avoid duplicate key errors
+_pairs_lock = threading.Lock()
+
+@retry(
+    retry=retry_if_exception_type(duckdb.IOException),
+    stop=stop_after_attempt(10),
+    wait=wait_exponential(multiplier=1.1, min=0.1, max=5),
+    reraise=True,
+)
+def connect_for_write(db_name=config.DB_FILENAME):
+    """
+    Opens a write connection, waiting for readers that briefly hold the database lock.
+    """
+    return profiling.connect(db_name)
+
 @sleep_and_retry
 @retry(wait=wait_exponential(multiplier=1.1, min=0.1, max=100))
 def setup_database(db_name=config.DB_FILENAME):
     """
     Connects to the DuckDB database, creates tables, and returns the connection.
     """
-    conn = duckdb.connect(db_name)
+    conn = profiling.connect(db_name)
 
+    # Create the collector tables and views, then the backtest tables
+    execute_sql_file(conn, "db.sql")
+    setup_backtest_tables(conn)
+
+    # Resolve the base and quote tokens of pairs loaded before they were tracked
+    resolve_pair_tokens(conn)
+
+    logger.info("Database setup complete.")
+    return conn
+
+def execute_sql_file(conn, filename):
+    """
+    Runs the SQL commands of a file next to this module.
+    """
     # Open the SQL file
     working_dir = os.path.dirname(os.path.abspath(__file__))
-    with open(working_dir + "/db.sql", 'r') as sql_file:
+    with open(os.path.join(working_dir, filename), 'r') as sql_file:
         sql_script = sql_file.read()
         sql_commands = sql_script.split(';')
 
@@ -28,41 +64,84 @@ def setup_database(db_name=config.DB_FILENAME):
         for sql in sql_commands:
             try:
                 if (sql.strip() != ""):
-                    conn.sql(sql)
+                    conn.execute(sql)
                     conn.commit()
             except duckdb.OperationalError as e:
                 logger.warning("SQL command failed: %s", sql)
                 logger.warning("Error: %s", e)
 
-    logger.info("Database setup complete.")
-    return conn
-
-def insert_meteora_api_entries(conn, entries, created_at):
+def setup_backtest_tables(conn):
     """
-    Reads data from the Meteora API and inserts into the DuckDB tables.
+    Creates the tables the backtester writes its runs and results to.
     """
-    # Load the raw API entries into the database
-    load_api_entries(conn, entries, created_at)
+    execute_sql_file(conn, "backtest.sql")
 
-    # Add the x and y mints to the token table
-    load_mints(conn)
-
-    # Load the pairs
-    load_pairs(conn)
+def resolve_pair_tokens(conn):
+    """
+    Backfills the base and quote mint ids of existing pairs, then indexes them.
+    """
+    conn.execute('''
+        UPDATE pairs 
+        SET 
+            base_mint_id = CASE WHEN r.y_is_quote THEN pairs.mint_x_id ELSE pairs.mint_y_id END,
+            quote_mint_id = CASE WHEN r.y_is_quote THEN pairs.mint_y_id ELSE pairs.mint_x_id END
+        FROM (
+            SELECT 
+                p.id,
+                coalesce(list_position($quote_mints, y.mint), 2147483647) 
+                    <= coalesce(list_position($quote_mints, x.mint), 2147483647) y_is_quote
+            FROM 
+                pairs p
+                JOIN tokens x ON p.mint_x_id = x.id
+                JOIN tokens y ON p.mint_y_id = y.id
+            WHERE 
+                p.base_mint_id IS NULL
+        ) r
+        WHERE 
+            pairs.id = r.id
+    ''', {"quote_mints": config.QUOTE_MINTS})
 
-    # Load the history
-    load_history(conn)
+    # The indexes are created after the backfill, because DuckDB cannot update
+    # indexed columns of a table referenced by a foreign key
+    conn.execute("CREATE INDEX IF NOT EXISTS pairs_base_mint_id_IDX ON pairs (base_mint_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS pairs_quote_mint_id_IDX ON pairs (quote_mint_id)")
+    conn.commit()
 
-    # Update the cumulative fees in the pairs table
-    update_cumulative_fees(conn, created_at)
+def insert_meteora_api_entries(conn, entries, created_at):
+    """
+    Reads data from the Meteora API and inserts into the DuckDB tables.
+    Returns the duration (seconds) and row count of each stage.
+    """
+    stages = [
+        # Load the raw API entries into the database
+        ("load_api_entries", lambda: load_api_entries(conn, entries, created_at)),
+        # Add the x and y mints to the token table
+        ("load_mints", lambda: load_mints(conn)),
+        # Load the pairs
+        ("load_pairs", lambda: load_pairs(conn)),
+        # Load the history
+        ("load_history", lambda: load_history(conn)),
+        # Update the cumulative fees in the pairs table
+        ("update_cumulative_fees", lambda: update_cumulative_fees(conn, created_at)),
+    ]
+    stats = {}
+    with _pairs_lock:
+        for stage, run_stage in stages:
+            start_time = time.perf_counter()
+            rows = run_stage()
+            duration = time.perf_counter() - start_time
+            STAGE_SECONDS.observe(duration, stage=stage)
+            STAGE_ROWS.set(rows, stage=stage)
+            stats[stage] = {"seconds": duration, "rows": rows}
 
-    # Unregister the api_entries table
-    conn.unregister('api_entries')
+        # Unregister the api_entries table
+        conn.unregister('api_entries')
     logger.debug("Data successfully fetched and inserted into the database.")
+    return stats
 
 def load_api_entries(conn, entries, created_at):
     """
-    Loads the raw API entries into the 'api_entries' table.
+    Loads the raw API entries into the 'api_entries' table, returning the number of entries.
     """
     # Convert the entries to a DataFrame
     api_entries_df = pd.DataFrame(entries)
@@ -79,38 +158,43 @@ def load_api_entries(conn, entries, created_at):
 
     # Register the 'api_entries' table
     conn.register('api_entries', api_entries_df)
+    return len(api_entries_df)
 
 def load_mints(conn):
     """
-    Loads the mint addresses into the 'tokens' table.
+    Loads the mint addresses into the 'tokens' table, returning the number of new tokens.
     """
-    conn.execute('''
+    new_x = conn.execute('''
         INSERT INTO tokens (mint, symbol)
         SELECT 
             mint_x mint,
             x symbol 
         FROM api_entries 
         ON CONFLICT DO NOTHING
-    ''')
-    conn.execute('''
+    ''').fetchone()[0]
+    new_y = conn.execute('''
         INSERT INTO tokens (mint, symbol)
         SELECT 
             mint_y mint,
             y symbol 
         FROM api_entries 
         ON CONFLICT DO NOTHING
-    ''')
+    ''').fetchone()[0]
+    return new_x + new_y
 
 def load_pairs(conn):
     """
-    Loads the pairs into the 'pairs' table.
+    Loads the pairs into the 'pairs' table, resolving their base and quote tokens
+    from the QUOTE_MINTS priority list. Returns the number of new pairs.
     """
-    conn.execute('''
+    return conn.execute('''
         INSERT INTO pairs (
             pair_address,
             name,
             mint_x_id,
             mint_y_id,
+            base_mint_id,
+            quote_mint_id,
             bin_step,
             base_fee_percentage,
             hide,
@@ -122,6 +206,8 @@ def load_pairs(conn):
             a.name,
             x.id,
             y.id,
+            CASE WHEN y_is_quote THEN x.id ELSE y.id END,
+            CASE WHEN y_is_quote THEN y.id ELSE x.id END,
             a.bin_step,
             a.base_fee_percentage,
             a.hide,
@@ -130,15 +216,20 @@ def load_pairs(conn):
         FROM 
             api_entries a
             JOIN tokens x ON a.mint_x = x.mint
-            JOIN tokens y ON a.mint_y = y.mint
+            JOIN tokens y ON a.mint_y = y.mint,
+            LATERAL (
+                SELECT 
+                    coalesce(list_position($quote_mints, y.mint), 2147483647) 
+                        <= coalesce(list_position($quote_mints, x.mint), 2147483647) y_is_quote
+            )
         ON CONFLICT DO NOTHING
-    ''')
+    ''', {"quote_mints": config.QUOTE_MINTS}).fetchone()[0]
 
 def load_history(conn):
     """
-    Loads the historical data into the 'pair_history' table.
+    Loads the historical data into the 'pair_history' table, returning the number of rows.
     """
-    conn.execute('''
+    return conn.execute('''
         INSERT INTO pair_history (
             created_at,
             pair_id,
@@ -155,13 +246,13 @@ def load_history(conn):
         FROM 
             api_entries a
             JOIN pairs p ON a.address = p.pair_address
-    ''')
+    ''').fetchone()[0]
 
 def update_cumulative_fees(conn, created_at):
     """
-    Updates the cumulative fee volume in the 'pairs' table.
+    Updates the cumulative fee volume in the 'pairs' table, returning the number of rows.
     """
-    conn.execute('''
+    return conn.execute('''
         UPDATE pairs 
         SET cumulative_fee_volume = coalesce((
             SELECT 
@@ -171,4 +262,144 @@ def update_cumulative_fees(conn, created_at):
             WHERE 
                 address = pairs.pair_address
         ), pairs.cumulative_fee_volume)
-    ''')
\ No newline at end of file
+    ''').fetchone()[0]
+
+def insert_hot_entries(conn, entries, created_at, max_gap=timedelta(minutes=5)):
+    """
+    Inserts pairs polled by the hot tier into the 'pair_history_hires' table,
+    returning the number of rows. Fees are the change in cumulative fee volume
+    since the pair's previous poll, or NULL if it was not polled within 'max_gap'.
+
+    Pairs the crawl has not stored yet, such as a new watchlisted pair, are
+    added to the 'pairs' table first.
+    """
+    with _pairs_lock:
+        load_api_entries(conn, entries, created_at)
+        try:
+            new_tokens = load_mints(conn)
+            new_pairs = load_pairs(conn)
+        finally:
+            conn.unregister('api_entries')
+    if new_pairs:
+        logger.info("Hot tier added %d new pair(s) and %d new token(s).", new_pairs, new_tokens)
+
+    hot_entries_df = pd.DataFrame(entries)[['address', 'current_price', 'liquidity', 'cumulative_fee_volume']]
+    hot_entries_df = hot_entries_df.astype({
+        'current_price': float,
+        'liquidity': float,
+        'cumulative_fee_volume': float,
+    }).drop_duplicates(subset='address')
+
+    conn.register('hot_entries', hot_entries_df)
+    try:
+        return conn.execute('''
+            INSERT INTO pair_history_hires (
+                created_at,
+                pair_id,
+                price,
+                liquidity,
+                cumulative_fee_volume,
+                fees
+            )
+            SELECT 
+                $created_at,
+                p.id pair_id,
+                a.current_price price,
+                a.liquidity,
+                a.cumulative_fee_volume,
+                cast(a.cumulative_fee_volume as FLOAT) - l.cumulative_fee_volume fees
+            FROM 
+                hot_entries a
+                JOIN pairs p ON a.address = p.pair_address
+                LEFT JOIN (
+                    SELECT 
+                        pair_id,
+                        arg_max(cumulative_fee_volume, created_at) cumulative_fee_volume
+                    FROM 
+                        pair_history_hires
+                    WHERE 
+                        created_at >= $since
+                    GROUP BY 
+                        pair_id
+                ) l ON l.pair_id = p.id
+        ''', {"created_at": created_at, "since": created_at - max_gap}).fetchone()[0]
+    finally:
+        conn.unregister('hot_entries')
+
+def trim_hot_history(conn, created_before):
+    """
+    Deletes high resolution history older than 'created_before', returning the number of rows.
+    """
+    return conn.execute(
+        "DELETE FROM pair_history_hires WHERE created_at < ?", [created_before]
+    ).fetchone()[0]
+
+def get_stale_tokens(conn, pair_addresses, fetched_before):
+    """
+    Returns the (id, mint) of the base tokens of the given pairs whose metadata
+    is missing or was fetched before 'fetched_before'.
+    """
+    return conn.execute('''
+        SELECT DISTINCT
+            t.id,
+            t.mint
+        FROM 
+            pairs p
+            JOIN tokens t ON p.base_mint_id = t.id
+            LEFT JOIN token_metadata m ON m.token_id = t.id
+        WHERE 
+            p.pair_address IN (SELECT unnest($pair_addresses))
+            AND t.mint NOT IN (SELECT unnest($quote_mints))
+            AND (m.fetched_at IS NULL OR m.fetched_at < $fetched_before)
+    ''', {
+        "pair_addresses": list(pair_addresses),
+        "quote_mints": config.QUOTE_MINTS,
+        "fetched_before": fetched_before,
+    }).fetchall()
+
+def upsert_token_metadata(conn, organic_scores, fetched_at):
+    """
+    Stores the organic scores (a dict of token id to score) in the 'token_metadata' table.
+    """
+    token_metadata_df = pd.DataFrame({
+        "token_id": list(organic_scores.keys()),
+        "organic_score": pd.array(list(organic_scores.values()), dtype="Int64"),
+    })
+    token_metadata_df["fetched_at"] = fetched_at
+    conn.register('token_metadata_df', token_metadata_df)
+    conn.execute('''
+        INSERT OR REPLACE INTO token_metadata (token_id, organic_score, fetched_at)
+        SELECT token_id, organic_score, fetched_at FROM token_metadata_df
+    ''')
+    conn.unregister('token_metadata_df')
+
+def record_snapshot(conn, job_run):
+    """
+    Records the completeness of a stored snapshot in the 'snapshots' table.
+    A snapshot is incomplete when some of the crawl's pages could not be fetched.
+    """
+    conn.execute('''
+        INSERT OR REPLACE INTO snapshots (created_at, num_pairs, pages, failed_pages, gap_filled, complete)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        job_run["created_at"],
+        job_run["num_pairs"],
+        job_run["pages"],
+        job_run["failed_pages"],
+        job_run["gap_filled"],
+        job_run["complete"],
+    ])
+
+def record_job_run(conn, job_run, retention_days=config.JOB_RUNS_RETENTION_DAYS):
+    """
+    Stores a collector run in the 'job_runs' table and drops runs older than the retention period.
+    """
+    columns = list(job_run.keys())
+    conn.execute(f'''
+        INSERT INTO job_runs ({", ".join(columns)})
+        VALUES ({", ".join("?" for _ in columns)})
+    ''', [job_run[column] for column in columns])
+    conn.execute(f'''
+        DELETE FROM job_runs 
+        WHERE started_at < now()::TIMESTAMP - INTERVAL {int(retention_days)} DAY
+    ''')
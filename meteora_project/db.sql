@@ -13,6 +13,8 @@ CREATE TABLE IF NOT EXISTS pairs (
   name VARCHAR NOT NULL,
   mint_x_id INTEGER NOT NULL REFERENCES tokens(id),
   mint_y_id INTEGER NOT NULL REFERENCES tokens(id),
+  base_mint_id INTEGER,
+  quote_mint_id INTEGER,
   bin_step INTEGER NOT NULL,
   base_fee_percentage FLOAT NOT NULL,
   hide BOOLEAN DEFAULT FALSE NOT NULL,
@@ -20,6 +22,13 @@ CREATE TABLE IF NOT EXISTS pairs (
   cumulative_fee_volume FLOAT NOT NULL
 );
 CREATE INDEX IF NOT EXISTS pairs_pair_address_IDX ON pairs (pair_address);
+ALTER TABLE pairs ADD COLUMN IF NOT EXISTS base_mint_id INTEGER;
+ALTER TABLE pairs ADD COLUMN IF NOT EXISTS quote_mint_id INTEGER;
+CREATE TABLE IF NOT EXISTS token_metadata (
+  token_id INTEGER PRIMARY KEY REFERENCES tokens(id),
+  organic_score INTEGER,
+  fetched_at TIMESTAMP NOT NULL
+);
 CREATE TABLE IF NOT EXISTS pair_history (
   created_at TIMESTAMP NOT NULL,
   pair_id INTEGER NOT NULL REFERENCES pairs(id),
@@ -29,6 +38,16 @@ CREATE TABLE IF NOT EXISTS pair_history (
 );
 CREATE INDEX IF NOT EXISTS pair_history_update_id_IDX ON pair_history (created_at);
 CREATE INDEX IF NOT EXISTS pair_history_update_id_dlmm_pair_id_IDX ON pair_history(created_at, pair_id);
+CREATE TABLE IF NOT EXISTS pair_history_hires (
+  created_at TIMESTAMP NOT NULL,
+  pair_id INTEGER NOT NULL REFERENCES pairs(id),
+  price FLOAT NOT NULL,
+  liquidity FLOAT NOT NULL,
+  cumulative_fee_volume FLOAT NOT NULL,
+  fees FLOAT
+);
+CREATE INDEX IF NOT EXISTS pair_history_hires_created_at_IDX ON pair_history_hires (created_at);
+CREATE INDEX IF NOT EXISTS pair_history_hires_pair_id_created_at_IDX ON pair_history_hires (pair_id, created_at);
 CREATE VIEW IF NOT EXISTS v_pair_history AS WITH updates AS (
   SELECT DISTINCT created_at
   FROM pair_history
@@ -165,4 +184,41 @@ SELECT created_at dttm,
   near_max,
   std_dev_price,
   price_volatility_ratio
-FROM cumulative_stats;
\ No newline at end of file
+FROM cumulative_stats;
+CREATE SEQUENCE IF NOT EXISTS job_runs_id_seq;
+CREATE TABLE IF NOT EXISTS job_runs (
+  id INTEGER DEFAULT nextval('job_runs_id_seq') PRIMARY KEY,
+  started_at TIMESTAMP NOT NULL,
+  created_at TIMESTAMP,
+  status VARCHAR NOT NULL,
+  error VARCHAR,
+  num_pairs INTEGER,
+  pages INTEGER,
+  retries INTEGER,
+  rate_limit_wait_seconds FLOAT,
+  fetch_seconds FLOAT,
+  load_api_entries_seconds FLOAT,
+  load_mints_seconds FLOAT,
+  load_pairs_seconds FLOAT,
+  load_history_seconds FLOAT,
+  update_cumulative_fees_seconds FLOAT,
+  new_tokens INTEGER,
+  new_pairs INTEGER,
+  history_rows INTEGER,
+  prewarm_seconds FLOAT,
+  total_seconds FLOAT
+);
+CREATE INDEX IF NOT EXISTS job_runs_started_at_IDX ON job_runs (started_at);
+ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS lag_seconds FLOAT;
+ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS failed_pages INTEGER;
+ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS duplicates INTEGER;
+ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS gap_filled INTEGER;
+ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS complete BOOLEAN;
+CREATE TABLE IF NOT EXISTS snapshots (
+  created_at TIMESTAMP PRIMARY KEY,
+  num_pairs INTEGER NOT NULL,
+  pages INTEGER NOT NULL,
+  failed_pages INTEGER NOT NULL,
+  gap_filled INTEGER NOT NULL,
+  complete BOOLEAN NOT NULL
+);
@@ -0,0 +1,40 @@
+# enrichment.py
+
+import logging
+from datetime import datetime, timedelta
+from meteora_project import config
+from meteora_project.apis.jupiter import get_organic_scores
+from meteora_project.db import connect_for_write, get_stale_tokens, upsert_token_metadata
+from meteora_project.prewarm import get_top_pair_addresses
+
+logger = logging.getLogger(__name__)
+
+async def enrich_token_metadata(db_name=config.DB_FILENAME):
+    """
+    Refreshes the organic scores of the tokens in the current top opportunities
+    whose stored scores are missing or older than ORGANIC_SCORE_TTL.
+    """
+    pair_addresses = get_top_pair_addresses(config.ENRICH_TOP_K, config.ENRICH_TIMEFRAME)
+    if not pair_addresses:
+        logger.debug("No prewarmed summary available, skipping token enrichment.")
+        return
+
+    now = datetime.now()
+    conn = connect_for_write(db_name)
+    try:
+        stale_tokens = get_stale_tokens(conn, pair_addresses, now - timedelta(seconds=config.ORGANIC_SCORE_TTL))
+    finally:
+        conn.close()
+    if not stale_tokens:
+        return
+
+    # Fetch over the network without holding a database connection
+    token_ids = {mint: token_id for token_id, mint in stale_tokens}
+    scores = await get_organic_scores(list(token_ids.keys()))
+
+    conn = connect_for_write(db_name)
+    try:
+        upsert_token_metadata(conn, {token_ids[mint]: score for mint, score in scores.items()}, now)
+    finally:
+        conn.close()
+    logger.debug("Refreshed organic scores for %d of %d tokens.", len(scores), len(stale_tokens))
@@ -0,0 +1,73 @@
+# hot_tier.py
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from meteora_project import config, metrics
+from meteora_project.apis.meteora_dlmm import budget, fetch_pairs
+from meteora_project.db import connect_for_write, insert_hot_entries, trim_hot_history
+from meteora_project.prewarm import get_top_pair_addresses
+
+logger = logging.getLogger(__name__)
+
+HOT_POLL_SECONDS = metrics.histogram("hot_tier_poll_seconds", "Duration of a hot tier poll, fetch and write")
+HOT_PAIRS = metrics.gauge("hot_tier_pairs", "Pairs polled by the hot tier in the last poll")
+HOT_SKIPPED_POLLS = metrics.counter("hot_tier_skipped_polls_total", "Hot tier polls skipped because the previous one overran")
+
+def get_hot_pair_addresses(num_pairs=config.HOT_TIER_TOP_K, watchlist=config.HOT_TIER_WATCHLIST):
+    """
+    Returns the pairs polled by the hot tier: the watchlist, then the current top pairs.
+    """
+    pair_addresses = list(watchlist)
+    if num_pairs > 0:
+        pair_addresses += get_top_pair_addresses(num_pairs, config.HOT_TIER_TIMEFRAME)
+    return list(dict.fromkeys(pair_addresses))
+
+def write_hot_snapshot(entries, created_at, db_name=config.DB_FILENAME):
+    """
+    Stores a hot tier poll and drops high resolution history past its retention.
+    """
+    conn = connect_for_write(db_name)
+    try:
+        rows = insert_hot_entries(conn, entries, created_at)
+        trim_hot_history(conn, created_at - timedelta(hours=config.HOT_HISTORY_RETENTION_HOURS))
+        return rows
+    finally:
+        conn.close()
+
+async def run_hot_tier(next_poll, interval):
+    """
+    Polls the hot pairs through the per-pair endpoint every 'interval'.
+
+    Requests go through the same rate budget as the full crawl at a higher
+    priority, so the hot tier keeps its cadence and the crawl uses what is left.
+    """
+    hot_rate = (config.HOT_TIER_TOP_K + len(config.HOT_TIER_WATCHLIST)) / interval.total_seconds()
+    if hot_rate > 0.5 * budget.calls / budget.period:
+        logger.warning(
+            "The hot tier may use %.1f of the %.1f requests per second budget, slowing down the full crawl.",
+            hot_rate, budget.calls / budget.period
+        )
+
+    while True:
+        await asyncio.sleep(max(0, (next_poll - datetime.now()).total_seconds()))
+
+        pair_addresses = get_hot_pair_addresses()
+        if pair_addresses:
+            start_time = time.perf_counter()
+            try:
+                entries = await fetch_pairs(pair_addresses)
+                if entries:
+                    rows = await asyncio.to_thread(write_hot_snapshot, entries, next_poll)
+                    logger.debug("Hot tier stored %d of %d pairs in %.2f seconds", rows, len(pair_addresses), time.perf_counter() - start_time)
+                HOT_PAIRS.set(len(entries))
+            except Exception as e:
+                logger.exception("Exception occurred while polling the hot tier: %s", e)
+            HOT_POLL_SECONDS.observe(time.perf_counter() - start_time)
+
+        # Skip the polls that were due while this one ran, rather than bunching them up
+        next_poll += interval
+        while next_poll + interval <= datetime.now():
+            HOT_SKIPPED_POLLS.inc()
+            next_poll += interval
@@ -1,74 +1,203 @@
 # main.py
 
 import asyncio
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import logging
-import duckdb
 import time
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from meteora_project.apis.meteora_dlmm import meteora_lp_api
-from meteora_project.db import insert_meteora_api_entries, setup_database
-from meteora_project import config
+from meteora_project.apis import meteora_dlmm
+from meteora_project.apis.meteora_dlmm import active_addresses, crawl_pairs
+from meteora_project.db import setup_database
+from meteora_project.enrichment import enrich_token_metadata
+from meteora_project.hot_tier import run_hot_tier
+from meteora_project.prewarm import prewarm_summaries
+from meteora_project import config, db, metrics, queries
 
-# Configure logging (adjust level as needed)
-logging.basicConfig(level=config.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-async def run_job():
-    """Fetch API data, insert it into the database, and log progress."""
+JOB_SECONDS = metrics.histogram("collector_job_seconds", "Duration of a full collector run", ["status"])
+LAST_SUCCESS = metrics.gauge("collector_last_success_timestamp_seconds", "Unix time of the last successful collector run")
+LAST_PAIRS = metrics.gauge("collector_last_pairs", "Pairs returned by the API in the last collector run")
 
-    conn = duckdb.connect(config.DB_FILENAME)
+MISSED_SNAPSHOTS = metrics.counter("collector_missed_snapshots_total", "Minute snapshots skipped because the collector fell behind")
+SNAPSHOT_LAG = metrics.gauge("collector_snapshot_lag_seconds", "Delay between a snapshot's interval start and the end of its write")
+
+SNAPSHOT_INTERVAL = timedelta(minutes=config.CRAWL_INTERVAL_MINUTES)
+HOT_TIER_INTERVAL = timedelta(seconds=config.HOT_TIER_INTERVAL_SECONDS)
+
+def interval_boundary(moment, interval):
+    """Returns the start of the wall-clock interval containing 'moment'."""
+    return moment - (moment - datetime.min) % interval
+
+async def fetch_snapshot(created_at, previous_addresses=()):
+    """Fetch the API data for the snapshot taken at 'created_at'."""
+
+    job_run = {"started_at": datetime.now(), "created_at": created_at, "status": "error"}
+    retries_before = meteora_dlmm.API_RETRIES.total()
+    wait_before = meteora_dlmm.API_RATE_LIMIT_WAIT.total()
+
+    data = None
     try:
-        # Fetch data from the API
-        start_time = time.time()
-        data = await meteora_lp_api()
-        end_time = time.time()
-        duration = end_time - start_time
-        logger.debug("API call duration: %.2f seconds", duration)
+        start_time = time.perf_counter()
+        data, report = await crawl_pairs(previous_addresses)
+        job_run.update({key: report[key] for key in ("pages", "failed_pages", "duplicates", "gap_filled", "complete")})
+        job_run["fetch_seconds"] = time.perf_counter() - start_time
+        db.STAGE_SECONDS.observe(job_run["fetch_seconds"], stage="fetch")
+        logger.debug("API call duration: %.2f seconds", job_run["fetch_seconds"])
 
         if not data:
             logger.error("No data fetched from API.")
-            return
+            job_run["status"] = "empty"
+    except Exception as e:
+        job_run["error"] = str(e)
+        logger.exception("Exception occurred while fetching the snapshot for %s: %s", created_at, e)
+    finally:
+        job_run["retries"] = int(meteora_dlmm.API_RETRIES.total() - retries_before)
+        job_run["rate_limit_wait_seconds"] = meteora_dlmm.API_RATE_LIMIT_WAIT.total() - wait_before
 
-        # Insert the entries into the database.
-        created_at = datetime.now()
-        start_time = time.time()
-        insert_meteora_api_entries(conn, data, created_at)
-        end_time = time.time()
-        duration = end_time - start_time
-        logger.debug("Time to load API data into database: %.2f seconds", duration)
+    return job_run, data
 
-        conn.close()
-        logger.debug("Job complete at %s", datetime.now(timezone.utc).isoformat())
+def write_snapshot(job_run, data, job_start):
+    """Insert a fetched snapshot into the database, prewarm the dashboard and record the run."""
+
+    conn = None
+    try:
+        conn = db.connect_for_write(config.DB_FILENAME)
+        if data:
+            # Insert the entries into the database.
+            job_run["num_pairs"] = len(data)
+            stats = db.insert_meteora_api_entries(conn, data, job_run["created_at"])
+            for stage, stage_stats in stats.items():
+                job_run[f"{stage}_seconds"] = stage_stats["seconds"]
+            job_run["new_tokens"] = stats["load_mints"]["rows"]
+            job_run["new_pairs"] = stats["load_pairs"]["rows"]
+            job_run["history_rows"] = stats["load_history"]["rows"]
+            db.record_snapshot(conn, job_run)
+            logger.debug("Time to load API data into database: %.2f seconds", sum(s["seconds"] for s in stats.values()))
+
+            # Prewarm the dashboard summaries for the new snapshot.
+            start_time = time.perf_counter()
+            prewarm_summaries(conn)
+            job_run["prewarm_seconds"] = time.perf_counter() - start_time
+            db.STAGE_SECONDS.observe(job_run["prewarm_seconds"], stage="prewarm")
+            logger.debug("Time to prewarm dashboard summaries: %.2f seconds", job_run["prewarm_seconds"])
+
+            # A snapshot written after its interval is over is late
+            job_run["lag_seconds"] = (datetime.now() - job_run["created_at"]).total_seconds()
+            job_run["status"] = "late" if job_run["lag_seconds"] > SNAPSHOT_INTERVAL.total_seconds() else "ok"
+            SNAPSHOT_LAG.set(job_run["lag_seconds"])
+            LAST_SUCCESS.set(time.time())
+            LAST_PAIRS.set(len(data))
+            logger.debug("Snapshot %s complete at %s", job_run["created_at"], datetime.now(timezone.utc).isoformat())
 
     except Exception as e:
         # Log the exception stack trace for debugging.
-        logger.exception("Exception occurred while running the scheduled job: %s", e)
+        job_run["status"] = "error"
+        job_run["error"] = str(e)
+        logger.exception("Exception occurred while writing the snapshot for %s: %s", job_run["created_at"], e)
+
+    finally:
+        job_run["total_seconds"] = time.perf_counter() - job_start
+        JOB_SECONDS.observe(job_run["total_seconds"], status=job_run["status"])
+        if conn is not None:
+            try:
+                db.record_job_run(conn, job_run)
+            except Exception as e:
+                logger.exception("Failed to record the job run: %s", e)
+            conn.close()
+
+async def run_collector(write_queue, next_snapshot):
+    """
+    Fetch a snapshot at the start of every interval and hand it to the writer.
+
+    While snapshot N is being written, snapshot N+1 is already being fetched.
+    The queue holds at most one snapshot, so if writes fall behind the fetches
+    wait, and intervals that could not be fetched in time are recorded as missed.
+    """
+    previous_addresses = []
+    while True:
+        await asyncio.sleep(max(0, (next_snapshot - datetime.now()).total_seconds()))
+
+        job_start = time.perf_counter()
+        job_run, data = await fetch_snapshot(next_snapshot, previous_addresses)
+        await write_queue.put((job_run, data, job_start))
+        if data:
+            # Pairs active now are looked up on their own if the next crawl misses them
+            previous_addresses = active_addresses(data)
+
+        next_snapshot += SNAPSHOT_INTERVAL
+        missed = []
+        while next_snapshot + SNAPSHOT_INTERVAL <= datetime.now():
+            missed.append(next_snapshot)
+            next_snapshot += SNAPSHOT_INTERVAL
+        for created_at in missed:
+            MISSED_SNAPSHOTS.inc()
+            await write_queue.put(({"started_at": datetime.now(), "created_at": created_at, "status": "missed"}, None, time.perf_counter()))
+        if missed:
+            logger.warning("Collector fell behind, missed %d snapshot(s) from %s.", len(missed), missed[0])
+
+async def run_writer(write_queue):
+    """Write the fetched snapshots in order, in a worker thread so the event loop keeps fetching."""
+    while True:
+        job_run, data, job_start = await write_queue.get()
+        try:
+            await asyncio.to_thread(write_snapshot, job_run, data, job_start)
+        except Exception as e:
+            # One failed write must not stop the writer, the next snapshot is written as usual
+            logger.exception("Exception occurred in the writer for %s: %s", job_run["created_at"], e)
+        finally:
+            write_queue.task_done()
+
+async def run_enrichment():
+    """Refresh the token metadata of the current top opportunities."""
+    try:
+        start_time = time.time()
+        await enrich_token_metadata()
+        end_time = time.time()
+        duration = end_time - start_time
+        logger.debug("Token enrichment duration: %.2f seconds", duration)
+    except Exception as e:
+        logger.exception("Exception occurred while enriching token metadata: %s", e)
 
 async def load_database():
     # Set up the SQLite database.
     setup_database(config.DB_FILENAME)
 
-    # Run the job immediately on startup
-    await run_job()
-    logger.debug("Job successfully executed on startup.")
-
-    # Create a blocking scheduler
-    scheduler = AsyncIOScheduler()
+    # Serve the collector and dashboard metrics
+    await metrics.start_metrics_server()
+    logger.info("Metrics available on port %d.", config.METRICS_PORT)
 
-    # Schedule the job to run every 1 minute
-    scheduler.add_job(run_job, 'interval', minutes=1)
+    # Start with the current interval, unless it was already collected before a restart
+    conn = db.connect_for_write(config.DB_FILENAME)
+    try:
+        last_snapshot = queries.get_snapshot(conn)
+    finally:
+        conn.close()
+    next_snapshot = interval_boundary(datetime.now(), SNAPSHOT_INTERVAL)
+    if last_snapshot is not None and last_snapshot >= next_snapshot:
+        next_snapshot += SNAPSHOT_INTERVAL
 
-    logger.info("Scheduler started; job will run every minute.")
+    # Enrich token metadata in the background, starting right away
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(run_enrichment, 'interval', minutes=config.ENRICH_INTERVAL_MINUTES, next_run_time=datetime.now())
     scheduler.start()
 
-    # Use an asyncio Event to keep the coroutine running
-    stop_event = asyncio.Event()
+    # Crawl on every interval boundary, writing each snapshot while the next one is fetched,
+    # and poll the hot pairs in between
+    write_queue = asyncio.Queue(maxsize=1)
+    next_hot_poll = interval_boundary(datetime.now(), HOT_TIER_INTERVAL) + HOT_TIER_INTERVAL
+    logger.info("Collector started; snapshots will be taken every %s from %s.", SNAPSHOT_INTERVAL, next_snapshot)
     try:
-        await stop_event.wait()
-    except KeyboardInterrupt:
-        logger.info("Scheduler stopped by user.")
+        await asyncio.gather(
+            run_collector(write_queue, next_snapshot),
+            run_writer(write_queue),
+            run_hot_tier(next_hot_poll, HOT_TIER_INTERVAL),
+        )
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        logger.info("Collector stopped by user.")
         scheduler.shutdown()
+        raise
 
 if __name__ == "__main__":
+    logging.basicConfig(level=config.LOG_LEVEL)
     asyncio.run(load_database())
@@ -0,0 +1,210 @@
+# metrics.py
+
+import glob
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from meteora_project import config
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Metric:
+    """
+    A metric family with optional labels, rendered in the Prometheus text format.
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = [
+            '%s="%s"' % (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in pairs
+        ]
+        return "{" + ",".join(escaped) + "}"
+
+    def get(self, **labels):
+        """
+        Returns the current value for a label set.
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        """
+        Returns the sum of the values over every label set.
+        """
+        with self._lock:
+            return sum(self._values.values())
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + self._format_labels(key), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{name} {_format_value(value)}" for name, value in self.samples()]
+        return "\n".join(lines)
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the block, in seconds.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def get(self, **labels):
+        """
+        Returns the (count, sum) of the observations for a label set.
+        """
+        with self._lock:
+            counts, total = self._values.get(self._key(labels), ([0] * len(self.buckets), 0.0))
+            return counts[-1], total
+
+    def total(self):
+        with self._lock:
+            return sum(total for _, total in self._values.values())
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    le = "+Inf" if bound == math.inf else _format_value(bound)
+                    samples.append((self.name + "_bucket" + self._format_labels(key, [("le", le)]), count))
+                samples.append((self.name + "_sum" + self._format_labels(key), total))
+                samples.append((self.name + "_count" + self._format_labels(key), counts[-1]))
+        return samples
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Registry:
+    """
+    The set of metrics reported by this process.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Modules may be re-executed (e.g. Streamlit reruns), so reuse existing metrics
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = Registry()
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+def write_textfile(process_name, metrics_path=config.METRICS_PATH):
+    """
+    Writes this process's metrics to '<process_name>.prom', for processes that
+    cannot serve HTTP themselves. The collector's /metrics endpoint includes them.
+    """
+    os.makedirs(metrics_path, exist_ok=True)
+    path = os.path.join(metrics_path, f"{process_name}.prom")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as metrics_file:
+        metrics_file.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+def render_all(metrics_path=config.METRICS_PATH):
+    """
+    Renders this process's metrics followed by the textfiles of other processes.
+    """
+    output = [REGISTRY.render()]
+    for path in sorted(glob.glob(os.path.join(metrics_path, "*.prom"))):
+        try:
+            with open(path, "r") as metrics_file:
+                output.append(metrics_file.read())
+        except FileNotFoundError:
+            continue
+    return "".join(output)
+
+async def start_metrics_server(host=config.METRICS_HOST, port=config.METRICS_PORT):
+    """
+    Serves /metrics in the Prometheus text format from the running event loop.
+    """
+    from aiohttp import web
+
+    async def get_metrics(request):
+        return web.Response(text=render_all(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", get_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
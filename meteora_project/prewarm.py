@@ -0,0 +1,136 @@
+# prewarm.py
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+from meteora_project import config
+from meteora_project.queries import TIMEFRAMES, get_partial_snapshot_count, get_snapshot, get_summary_data, get_update_count
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+
+def summary_path(num_minutes, prewarm_path=config.PREWARM_PATH):
+    """
+    Returns the path of the prewarmed summary file for a timeframe.
+    """
+    return os.path.join(prewarm_path, f"summary_{num_minutes}.arrow")
+
+def _atomic_write(path, write):
+    """
+    Writes a file through 'write(tmp_path)' and renames it into place, so readers
+    never see a partially written file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_arrow(path, df):
+    """
+    Writes a DataFrame as an Arrow IPC file.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    def write(tmp_path):
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    _atomic_write(path, write)
+
+def read_arrow(path):
+    """
+    Memory maps an Arrow IPC file and returns it as an Arrow backed DataFrame,
+    without copying the column buffers.
+    """
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def write_manifest(manifest, prewarm_path=config.PREWARM_PATH):
+    """
+    Writes the manifest describing the prewarmed snapshot.
+    """
+    def write(tmp_path):
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+    _atomic_write(os.path.join(prewarm_path, MANIFEST_FILENAME), write)
+
+def read_manifest(prewarm_path=config.PREWARM_PATH):
+    """
+    Returns the manifest of the prewarmed snapshot, or None if nothing was prewarmed.
+    """
+    try:
+        with open(os.path.join(prewarm_path, MANIFEST_FILENAME), "r") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    manifest["snapshot"] = datetime.fromisoformat(manifest["snapshot"])
+    # JSON object keys are strings
+    manifest["partial_snapshots"] = {int(k): v for k, v in manifest.get("partial_snapshots", {}).items()}
+    return manifest
+
+def read_summary(num_minutes, prewarm_path=config.PREWARM_PATH):
+    """
+    Returns the prewarmed summary for a timeframe, or None if it is not available.
+    """
+    try:
+        return read_arrow(summary_path(num_minutes, prewarm_path))
+    except FileNotFoundError:
+        return None
+
+def get_top_pair_addresses(num_pairs, num_minutes, prewarm_path=config.PREWARM_PATH):
+    """
+    Returns the addresses of the current top opportunities by Geek 24h Fee / TVL,
+    read from the prewarmed summary.
+
+    Until enough snapshots are collected for 'num_minutes', the longest shorter
+    timeframe that was prewarmed is used instead.
+    """
+    summary_data = read_summary(num_minutes, prewarm_path)
+    if summary_data is None:
+        manifest = read_manifest(prewarm_path)
+        shorter = [t for t in (manifest or {}).get("timeframes", []) if t < num_minutes]
+        if shorter:
+            logger.debug("No %d minute summary yet, using the %d minute summary.", num_minutes, max(shorter))
+            summary_data = read_summary(max(shorter), prewarm_path)
+    if summary_data is None or summary_data.empty:
+        return []
+    top_pairs = summary_data.sort_values("pct_geek_fees_liquidity_24h", ascending=False).head(num_pairs)
+    return top_pairs["pair_address"].tolist()
+
+def prewarm_summaries(conn, prewarm_path=config.PREWARM_PATH):
+    """
+    Computes the summary of every available timeframe for the latest snapshot and
+    writes them as Arrow IPC files, followed by the manifest.
+    """
+    os.makedirs(prewarm_path, exist_ok=True)
+    snapshot = get_snapshot(conn)
+    if snapshot is None:
+        return None
+    update_count = get_update_count(conn)
+    timeframes = [num_minutes for num_minutes in TIMEFRAMES if num_minutes <= update_count]
+
+    partial_snapshots = {}
+    for num_minutes in timeframes:
+        partial_snapshots[num_minutes] = get_partial_snapshot_count(conn, num_minutes)
+        start_time = time.time()
+        summary_data = get_summary_data(conn, num_minutes)
+        write_arrow(summary_path(num_minutes, prewarm_path), summary_data)
+        logger.debug("Prewarmed %d minute summary in %.2f seconds", num_minutes, time.time() - start_time)
+
+    # The manifest is written last, so it only ever points at complete files
+    manifest = {
+        "snapshot": snapshot.isoformat(),
+        "update_count": update_count,
+        "timeframes": timeframes,
+        "partial_snapshots": partial_snapshots,
+    }
+    write_manifest(manifest, prewarm_path)
+    return manifest
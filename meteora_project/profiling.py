@@ -0,0 +1,225 @@
+# profiling.py
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+import duckdb
+from meteora_project import config
+
+logger = logging.getLogger(__name__)
+
+# Result methods after which a query has run to completion
+FETCH_METHODS = ["fetchone", "fetchall", "fetchmany", "fetchdf", "fetch_df", "df", "fetchnumpy", "arrow", "fetch_arrow_table", "pl"]
+
+def normalize_query(sql):
+    """
+    Collapses the whitespace of a query, so formatting does not change its hash.
+    """
+    return " ".join(sql.split())
+
+def query_hash(sql):
+    """
+    Returns a short hash identifying a query by its text.
+    """
+    return hashlib.sha1(normalize_query(sql).encode()).hexdigest()[:12]
+
+def connect(database=config.DB_FILENAME, read_only=False, threshold_ms=config.QUERY_PROFILE_THRESHOLD_MS):
+    """
+    Connects to the DuckDB database, logging the queries slower than
+    'threshold_ms' when the slow query log is enabled.
+    """
+    conn = duckdb.connect(database, read_only=read_only)
+    if threshold_ms <= 0:
+        return conn
+    return ProfiledConnection(conn, threshold_ms / 1000)
+
+class ProfiledConnection:
+    """
+    DuckDB connection that writes the profile of its slow queries to the slow query log.
+
+    DuckDB profiles every query without writing the profile out. A query is
+    timed while it executes and while its result is fetched, and when it took
+    longer than the threshold its text, parameters, timings and operator tree
+    are written to 'profile_path'.
+    """
+
+    def __init__(self, conn, threshold, profile_path=config.QUERY_PROFILE_PATH):
+        self._conn = conn
+        self.threshold = threshold
+        self.profile_path = profile_path
+        self._pending = None
+        conn.execute("PRAGMA enable_profiling = 'no_output'")
+
+    def __getattr__(self, name):
+        attr = getattr(self._conn, name)
+        if name in FETCH_METHODS:
+            def fetch(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    if self._pending is not None:
+                        self._pending["seconds"] += time.perf_counter() - start_time
+                    self._finish()
+            return fetch
+        return attr
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def execute(self, query, parameters=None):
+        self._finish()
+        caller = sys._getframe(1)
+        start_time = time.perf_counter()
+        self._conn.execute(query, parameters)
+        self._pending = {
+            "sql": query,
+            "parameters": parameters,
+            "caller": f"{caller.f_globals.get('__name__')}.{caller.f_code.co_name}",
+            "seconds": time.perf_counter() - start_time,
+        }
+        return self
+
+    def close(self):
+        self._finish()
+        self._conn.close()
+
+    def _finish(self):
+        """
+        Logs the pending query if it was slow.
+        """
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        seconds = pending["seconds"]
+        if seconds < self.threshold:
+            return
+
+        # The profile is only complete once the result was fully fetched
+        try:
+            profile = json.loads(self._conn.get_profiling_information(format="json"))
+        except (duckdb.Error, ValueError):
+            profile = None
+        # Newer DuckDB versions leave query_name empty when profiling to no_output,
+        # so only a named profile for another statement is discarded
+        query_name = profile.get("query_name") if profile is not None else None
+        if query_name and normalize_query(query_name) != normalize_query(pending["sql"]):
+            profile = None
+
+        entry = {
+            "query_hash": query_hash(pending["sql"]),
+            "logged_at": datetime.now().isoformat(),
+            "process": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python",
+            "caller": pending["caller"],
+            "sql": pending["sql"],
+            "parameters": pending["parameters"],
+            "seconds": seconds,
+            "latency": profile.get("latency") if profile else None,
+            "profile": profile,
+        }
+        try:
+            write_profile(entry, self.profile_path)
+        except OSError as e:
+            logger.warning("Could not write the profile of a slow query: %s", e)
+        logger.info("Slow query %s in %s took %.3f seconds", entry["query_hash"], entry["caller"], seconds)
+
+def write_profile(entry, profile_path=config.QUERY_PROFILE_PATH, max_files=config.QUERY_PROFILE_MAX_FILES):
+    """
+    Writes a slow query entry to the log, keeping at most 'max_files' entries.
+    """
+    os.makedirs(profile_path, exist_ok=True)
+    filename = f"{datetime.now():%Y%m%dT%H%M%S%f}_{entry['query_hash']}_{os.getpid()}.json"
+    path = os.path.join(profile_path, filename)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f, default=str)
+    os.replace(tmp_path, path)
+
+    filenames = sorted(name for name in os.listdir(profile_path) if name.endswith(".json"))
+    for name in filenames[:max(0, len(filenames) - max_files)]:
+        try:
+            os.remove(os.path.join(profile_path, name))
+        except FileNotFoundError:
+            pass
+
+def read_profiles(profile_path=config.QUERY_PROFILE_PATH, since=None):
+    """
+    Returns the slow query log entries, oldest first, optionally only those logged after 'since'.
+    """
+    if not os.path.isdir(profile_path):
+        return []
+    entries = []
+    for name in sorted(os.listdir(profile_path)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(profile_path, name)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if since is None or datetime.fromisoformat(entry["logged_at"]) >= since:
+            entries.append(entry)
+    return entries
+
+def iter_operators(node, depth=0):
+    """
+    Yields every operator of a profile's operator tree with its depth.
+    """
+    for child in node.get("children", []):
+        yield depth, child
+        yield from iter_operators(child, depth + 1)
+
+def slowest_operator(profile):
+    """
+    Returns the name and timing of the operator that took the longest in a profile.
+    """
+    operators = [operator for _, operator in iter_operators(profile or {})]
+    if not operators:
+        return None, None
+    operator = max(operators, key=lambda operator: operator.get("operator_timing", 0))
+    return operator.get("operator_name") or operator.get("operator_type"), operator.get("operator_timing")
+
+def summarize_profiles(entries):
+    """
+    Groups slow query log entries by query, slowest total time first.
+    """
+    queries = {}
+    for entry in entries:
+        query = queries.setdefault(entry["query_hash"], {
+            "query_hash": entry["query_hash"],
+            "caller": entry["caller"],
+            "sql": normalize_query(entry["sql"]),
+            "count": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "slowest": entry,
+        })
+        query["count"] += 1
+        query["total_seconds"] += entry["seconds"]
+        if entry["seconds"] >= query["max_seconds"]:
+            query["max_seconds"] = entry["seconds"]
+            query["slowest"] = entry
+    summary = sorted(queries.values(), key=lambda query: query["total_seconds"], reverse=True)
+    for query in summary:
+        query["mean_seconds"] = query["total_seconds"] / query["count"]
+        query["slowest_operator"], query["slowest_operator_seconds"] = slowest_operator(query["slowest"]["profile"])
+    return summary
+
+def format_operator_tree(profile):
+    """
+    Renders a profile's operator tree, one operator per line with its timing and output rows.
+    """
+    lines = []
+    for depth, operator in iter_operators(profile or {}):
+        name = operator.get("operator_name") or operator.get("operator_type")
+        lines.append(
+            f"{'  ' * depth}{name}  {operator.get('operator_timing', 0):.4f}s  {operator.get('operator_cardinality', 0)} rows"
+        )
+    return "\n".join(lines)
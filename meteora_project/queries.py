@@ -0,0 +1,320 @@
+# queries.py
+
+# Analysis timeframes, in minutes
+TIMEFRAMES = [5, 15, 30, 60, 120, 360, 720, 1440]
+
+def _pair_stats_query(num_minutes, where, order_by=""):
+    """
+    Builds the cumulative per pair statistics query over the last 'num_minutes' snapshots.
+    """
+    return f"""
+        WITH updates AS (
+          SELECT DISTINCT created_at
+          FROM pair_history
+          ORDER BY created_at DESC
+          LIMIT {int(num_minutes)}
+        ), cumulative_stats AS (
+          SELECT h.created_at,
+            p.name,
+            p.pair_address,
+            p.bin_step,
+            p.base_fee_percentage,
+            h.price,
+            h.liquidity,
+            h.fees,
+            count(*) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) num_minutes,
+            avg(h.price) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) avg_price,
+            sum(h.fees) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) cumulative_fees,
+            avg(h.liquidity) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) avg_liquidity,
+            round(
+              stddev_samp(h.liquidity) OVER (
+                PARTITION BY p.id
+                ORDER BY created_at
+              ),
+              2
+            ) liquidity_std_dev,
+            round(liquidity_std_dev / avg_liquidity, 2) liquidity_volatility_ratio,
+            CASE
+              WHEN avg_liquidity = 0 THEN 0
+              ELSE 100 * cumulative_fees / (avg_liquidity + liquidity_std_dev)
+            END pct_geek_fees_liquidity,
+            round(
+              60 * 24 * pct_geek_fees_liquidity / num_minutes,
+              2
+            ) pct_geek_fees_liquidity_24h,
+            count(*) FILTER (fees > 0) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) num_minutes_with_volume,
+            round(100 * num_minutes_with_volume / num_minutes) pct_minutes_with_volume,
+            coalesce(
+              lag(h.price) OVER (
+                PARTITION BY p.id
+                ORDER BY created_at
+              ) < h.price,
+              false
+            ) tick_up,
+            coalesce(
+              lag(h.price) OVER (
+                PARTITION BY p.id
+                ORDER BY created_at
+              ) > h.price,
+              false
+            ) tick_down,
+            min(h.price) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) min_price,
+            max(h.price) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) max_price,
+            round(100 * (max_price - min_price) / min_price, 2) pct_price_range,
+            ceil(log(max_price / min_price) / log(1 + p.bin_step / 10000.0)) bins_range,
+            ceil(bins_range / 69) num_positions_range,
+            100 * (max_price - h.price) / max_price pct_below_max,
+            ceil(log(1 + pct_below_max / 100) / log(1 + p.bin_step / 10000.0)) bins_below_max,
+            coalesce(bins_below_max <= 7, false) near_max,
+            stddev_samp(h.price) OVER (
+              PARTITION BY p.id
+              ORDER BY created_at
+            ) std_dev_price,
+            std_dev_price / avg_price price_volatility_ratio
+          FROM pair_history h
+            JOIN pairs p ON h.pair_id = p.id
+          WHERE NOT p.is_blacklisted
+            AND h.created_at IN (
+              SELECT created_at
+              from updates
+            )
+        )
+        SELECT created_at dttm,
+          name,
+          pair_address,
+          bin_step,
+          base_fee_percentage,
+          price,
+          liquidity,
+          fees,
+          num_minutes,
+          avg_price,
+          cumulative_fees,
+          avg_liquidity,
+          liquidity_std_dev,
+          liquidity_volatility_ratio,
+          pct_geek_fees_liquidity,
+          pct_geek_fees_liquidity_24h,
+          stddev_samp(pct_geek_fees_liquidity_24h) OVER (
+            PARTITION BY pair_address
+            ORDER BY created_at
+          ) std_dev_pct_geek_fees_liquidity_24h,
+          std_dev_pct_geek_fees_liquidity_24h / pct_geek_fees_liquidity_24h pct_geek_fees_liquidity_24h_volatility_ratio,
+          num_minutes_with_volume,
+          pct_minutes_with_volume,
+          sum(tick_up) OVER (
+            PARTITION BY pair_address
+            ORDER BY created_at
+          ) num_tick_up,
+          sum(tick_down) OVER (
+            PARTITION BY pair_address
+            ORDER BY created_at
+          ) num_tick_down,
+          round(
+            100 * num_tick_up / (num_tick_up + num_tick_down)
+          ) pct_tick_up,
+          min_price,
+          max_price,
+          pct_price_range,
+          bins_range,
+          num_positions_range,
+          pct_below_max,
+          bins_below_max,
+          near_max,
+          std_dev_price,
+          price_volatility_ratio
+        FROM cumulative_stats
+        WHERE
+          {where}
+        {order_by}
+    """
+
+def get_snapshot(conn):
+    """
+    Returns the timestamp of the latest snapshot in 'pair_history'.
+    """
+    return conn.execute("SELECT max(created_at) FROM pair_history").fetchone()[0]
+
+def get_update_count(conn):
+    """
+    Returns the number of snapshots collected.
+    """
+    return conn.execute("SELECT count(DISTINCT created_at) FROM pair_history").fetchone()[0]
+
+def get_partial_snapshot_count(conn, num_minutes):
+    """
+    Returns how many of the last 'num_minutes' snapshots are missing pages of the crawl.
+    """
+    return conn.execute(f"""
+        SELECT count(*)
+        FROM snapshots
+        WHERE NOT complete
+          AND created_at >= (
+            SELECT min(created_at) FROM (
+              SELECT DISTINCT created_at
+              FROM pair_history
+              ORDER BY created_at DESC
+              LIMIT {int(num_minutes)}
+            )
+          )
+    """).fetchone()[0]
+
+def _select_columns(query, columns):
+    """
+    Restricts a query to 'columns', so DuckDB skips computing the others.
+    """
+    if columns is None:
+        return query
+    select_list = ", ".join('"' + column.replace('"', '""') + '"' for column in columns)
+    return f"SELECT {select_list} FROM ({query})"
+
+def get_summary_data(conn, num_minutes, columns=None):
+    """
+    Returns the latest statistics of every pair with at least 90% of 'num_minutes' of history,
+    optionally only the given columns.
+    """
+    query = _pair_stats_query(
+        num_minutes,
+        where=f"""created_at = (SELECT max(created_at) FROM pair_history)
+          AND num_minutes >= {num_minutes * 0.9}""",
+    )
+    return conn.execute(_select_columns(query, columns)).fetchdf()
+
+def get_pair_details(conn, pair_address, num_minutes, columns=None):
+    """
+    Returns the statistics of a pair for every snapshot in the last 'num_minutes',
+    optionally only the given columns.
+    """
+    query = _pair_stats_query(
+        num_minutes,
+        where="pair_address = ?",
+        order_by="ORDER BY created_at",
+    )
+    return conn.execute(_select_columns(query, columns), [pair_address]).fetchdf()
+
+def get_token(conn, pair_address):
+    """
+    Returns the (symbol, mint) of the base token of a pair.
+    """
+    return conn.execute("""
+        SELECT 
+            t.symbol, t.mint
+        FROM 
+            pairs p 
+            JOIN tokens t ON p.base_mint_id = t.id
+        WHERE 
+            p.pair_address = ?
+    """, [pair_address]).fetchone()
+
+def get_token_pairs(conn, mint):
+    """
+    Returns every pair that has the token as its base or quote token.
+    """
+    token = conn.execute("SELECT id FROM tokens WHERE mint = ?", [mint]).fetchone()
+    token_id = token[0] if token else None
+    return conn.execute("""
+        SELECT 
+            pair_address, name, bin_step, base_fee_percentage, 'base' side
+        FROM 
+            pairs
+        WHERE 
+            base_mint_id = $token_id
+        UNION ALL
+        SELECT 
+            pair_address, name, bin_step, base_fee_percentage, 'quote' side
+        FROM 
+            pairs
+        WHERE 
+            quote_mint_id = $token_id
+    """, {"token_id": token_id}).fetchdf()
+
+def get_organic_score(conn, mint):
+    """
+    Returns the stored organic score of a token, or None if it has not been fetched.
+    """
+    result = conn.execute("""
+        SELECT 
+            m.organic_score
+        FROM 
+            tokens t
+            JOIN token_metadata m ON m.token_id = t.id
+        WHERE 
+            t.mint = ?
+    """, [mint]).fetchone()
+    return result[0] if result else None
+
+def get_pair_tokens(conn, pair_addresses):
+    """
+    Returns the id, name and base and quote tokens of the given pairs.
+    """
+    return conn.execute("""
+        SELECT 
+            p.id pair_id, p.pair_address, p.name, p.bin_step,
+            b.mint base_mint, b.symbol base_symbol,
+            q.mint quote_mint, q.symbol quote_symbol
+        FROM 
+            pairs p
+            LEFT JOIN tokens b ON p.base_mint_id = b.id
+            LEFT JOIN tokens q ON p.quote_mint_id = q.id
+        WHERE 
+            p.pair_address IN (SELECT unnest($pair_addresses))
+    """, {"pair_addresses": list(pair_addresses)}).fetchdf()
+
+def get_price_history(conn, pair_ids, num_minutes):
+    """
+    Returns the price of the given pairs in each of the last 'num_minutes' snapshots,
+    as NumPy arrays of 'created_at', 'pair_id' and 'price'.
+    """
+    return conn.execute(f"""
+        WITH updates AS (
+          SELECT DISTINCT created_at
+          FROM pair_history
+          ORDER BY created_at DESC
+          LIMIT {int(num_minutes)}
+        )
+        SELECT h.created_at, h.pair_id, h.price
+        FROM pair_history h
+        WHERE h.created_at IN (SELECT created_at FROM updates)
+          AND h.pair_id IN (SELECT unnest($pair_ids))
+    """, {"pair_ids": [int(pair_id) for pair_id in pair_ids]}).fetchnumpy()
+
+def get_search_entries(conn, after_pair_id=0):
+    """
+    Returns the pairs added after 'after_pair_id', with the symbols and mints of
+    their tokens, in id order.
+    """
+    return conn.execute("""
+        SELECT 
+            p.id pair_id, p.pair_address, p.name, p.bin_step, p.base_fee_percentage,
+            b.symbol base_symbol, b.mint base_mint,
+            q.symbol quote_symbol, q.mint quote_mint
+        FROM 
+            pairs p
+            LEFT JOIN tokens b ON p.base_mint_id = b.id
+            LEFT JOIN tokens q ON p.quote_mint_id = q.id
+        WHERE 
+            p.id > ?
+        ORDER BY 
+            p.id
+    """, [int(after_pair_id)]).fetchdf()
@@ -0,0 +1,144 @@
+# search.py
+
+import bisect
+import logging
+import math
+import re
+import threading
+from collections import Counter
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = [
+    "pair_address", "name", "bin_step", "base_fee_percentage",
+    "base_symbol", "base_mint", "quote_symbol", "quote_mint",
+]
+
+# Scores of the match types; fuzzy matches score their trigram similarity (0 to 1)
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+
+def normalize(text):
+    """
+    Lower cases and trims a search term, treating missing values as empty.
+    """
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ""
+    return str(text).strip().lower()
+
+def trigrams(text):
+    """
+    Returns the set of three character substrings of a term.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """
+    In memory search index over pair names, token symbols, token mints and pair addresses.
+
+    Every term is kept in a sorted list for prefix lookups by bisection, and
+    names and symbols are also indexed by trigram for fuzzy matches. Pair ids
+    only grow, so the index is kept up to date by adding the pairs created
+    after the last one it holds, once per snapshot.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.last_pair_id = 0
+        self._entries = []
+        self._terms = []
+        self._trigrams = {}
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entries):
+        """
+        Indexes the pairs of a 'queries.get_search_entries' result.
+        """
+        terms = []
+        postings = {}
+        with self._lock:
+            for record in entries[["pair_id", *RESULT_COLUMNS]].to_dict("records"):
+                doc = len(self._entries)
+                self._entries.append(record)
+                name = normalize(record["name"])
+                symbols = [normalize(record["base_symbol"]), normalize(record["quote_symbol"])]
+                addresses = [normalize(record["pair_address"]), normalize(record["base_mint"]), normalize(record["quote_mint"])]
+                words = {name, *re.split(r"[^a-z0-9]+", name), *symbols, *addresses} - {""}
+                terms.extend((word, doc) for word in words)
+                for gram in set().union(*(trigrams(text) for text in [name, *symbols])):
+                    postings.setdefault(gram, []).append(doc)
+                self.last_pair_id = max(self.last_pair_id, int(record["pair_id"]))
+
+            # The existing terms are already sorted, so this merges in linear time
+            self._terms.extend(terms)
+            self._terms.sort()
+            for gram, docs in postings.items():
+                self._trigrams.setdefault(gram, set()).update(docs)
+
+    def update(self, snapshot, load_entries):
+        """
+        Adds the pairs created since the last update, at most once per snapshot.
+        'load_entries(after_pair_id)' returns them.
+        """
+        with self._update_lock:
+            if self.snapshot is not None and snapshot == self.snapshot:
+                return 0
+            entries = load_entries(self.last_pair_id)
+            if not entries.empty:
+                self.add(entries)
+                logger.debug("Indexed %d new pairs for search, %d in total.", len(entries), len(self._entries))
+            self.snapshot = snapshot
+            return len(entries)
+
+    def search(self, query, limit=20, min_similarity=0.6):
+        """
+        Returns the pairs best matching a query, as a list of records: exact
+        terms first, then prefixes, then names and symbols sharing most of its
+        trigrams.
+        """
+        query = normalize(query)
+        if query == "":
+            return []
+
+        scores = {}
+        with self._lock:
+            # Terms equal to the query sort first among those it prefixes
+            i = bisect.bisect_left(self._terms, (query,))
+            while i < len(self._terms) and len(scores) < limit and self._terms[i][0].startswith(query):
+                term, doc = self._terms[i]
+                scores[doc] = max(scores.get(doc, 0), EXACT_SCORE if term == query else PREFIX_SCORE)
+                i += 1
+
+            query_trigrams = sorted(trigrams(query), key=lambda gram: len(self._trigrams.get(gram, ())))
+            if len(scores) < limit and query_trigrams:
+                # A match shares at least 'needed' trigrams, so it holds one of the
+                # rarest ones; count those, then check the common ones by membership
+                needed = max(1, math.ceil(min_similarity * len(query_trigrams)))
+                num_rare = len(query_trigrams) - needed + 1
+                counts = Counter()
+                for gram in query_trigrams[:num_rare]:
+                    counts.update(self._trigrams.get(gram, ()))
+                for gram in query_trigrams[num_rare:]:
+                    docs = self._trigrams.get(gram, set())
+                    for doc in counts:
+                        if doc in docs:
+                            counts[doc] += 1
+                for doc, count in counts.most_common():
+                    similarity = count / len(query_trigrams)
+                    if similarity < min_similarity:
+                        break
+                    scores.setdefault(doc, similarity)
+
+            ranked = sorted(scores, key=lambda doc: (-scores[doc], len(self._entries[doc]["name"]), doc))[:limit]
+            return [self._entries[doc] for doc in ranked]
+
+    def search_frame(self, query, limit=20):
+        """
+        Returns the pairs best matching a query as a DataFrame.
+        """
+        return pd.DataFrame(self.search(query, limit), columns=["pair_id", *RESULT_COLUMNS])[RESULT_COLUMNS]
@@ -0,0 +1,286 @@
+# server.py
+
+import asyncio
+import logging
+import threading
+import time
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from aiohttp import web
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from meteora_project import config, metrics, profiling, queries
+from meteora_project.cache import SnapshotCache
+from meteora_project.prewarm import read_manifest, read_summary
+from meteora_project.queries import TIMEFRAMES
+from meteora_project.search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+JSON_CONTENT_TYPE = "application/json"
+
+REQUEST_SECONDS = metrics.histogram("query_api_request_seconds", "Latency of query API requests", ["route", "status"])
+
+class DataService:
+    """
+    Serves query results to every client from one shared cache.
+
+    Results are keyed on the latest snapshot and served from the collector's
+    prewarmed files where possible. On a cache miss, queries go through a single
+    DuckDB connection. It is opened only for the duration of the query so the
+    collector can still take its write lock.
+    """
+
+    def __init__(self, db_name=config.DB_FILENAME, prewarm_path=config.PREWARM_PATH):
+        self.db_name = db_name
+        self.prewarm_path = prewarm_path
+        self.cache = SnapshotCache(max_bytes=config.RESULT_CACHE_MAX_MB * 1024 * 1024, name="query_api")
+        self.search_index = SearchIndex()
+        self._manifest = None
+        self._manifest_checked_at = 0
+        self._manifest_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+
+    @retry(
+        retry=retry_if_exception_type(duckdb.IOException),
+        stop=stop_after_attempt(10),
+        wait=wait_exponential(multiplier=1.1, min=0.1, max=5),
+        reraise=True,
+    )
+    def query(self, fn, *args):
+        """
+        Runs a 'queries' function on a new read only connection, one query at a
+        time, closing it afterwards so the collector can take its write lock.
+        """
+        with self._db_lock:
+            conn = profiling.connect(self.db_name, read_only=True)
+            try:
+                return fn(conn, *args)
+            finally:
+                conn.close()
+
+    def manifest(self):
+        """
+        Returns the latest snapshot manifest, re-checking at most every SNAPSHOT_CHECK_SECONDS.
+        """
+        with self._manifest_lock:
+            if time.time() - self._manifest_checked_at >= config.SNAPSHOT_CHECK_SECONDS:
+                manifest = read_manifest(self.prewarm_path)
+                if manifest is None:
+                    manifest = {
+                        "snapshot": self.query(queries.get_snapshot),
+                        "update_count": self.query(queries.get_update_count),
+                        "timeframes": [],
+                        "partial_snapshots": {},
+                    }
+                self._manifest = manifest
+                self._manifest_checked_at = time.time()
+            return self._manifest
+
+    def cached(self, snapshot, key, compute):
+        """
+        Returns a result for 'snapshot' from the shared cache, computing it at most once.
+        """
+        return self.cache.get_or_compute(snapshot, key, compute)
+
+    def summary(self, num_minutes):
+        """
+        Returns the summary for a timeframe, from the prewarmed file if available.
+        """
+        if num_minutes in self.manifest()["timeframes"]:
+            summary_data = read_summary(num_minutes, self.prewarm_path)
+            if summary_data is not None:
+                return summary_data
+        return self.query(queries.get_summary_data, num_minutes)
+
+    def pair_details(self, pair_address, num_minutes):
+        """
+        Returns the time series of a pair.
+        """
+        return self.query(queries.get_pair_details, pair_address, num_minutes)
+
+    def token(self, pair_address):
+        """
+        Returns the base token of a pair as a one row DataFrame.
+        """
+        token = self.query(queries.get_token, pair_address)
+        return pd.DataFrame([token] if token else [], columns=["symbol", "mint"])
+
+    def token_pairs(self, mint):
+        """
+        Returns every pair that has the token as its base or quote token.
+        """
+        return self.query(queries.get_token_pairs, mint)
+
+    def search(self, query, limit):
+        """
+        Returns the pairs matching a search query, indexing the pairs added since the last snapshot first.
+        """
+        self.search_index.update(
+            self.manifest()["snapshot"],
+            lambda after_pair_id: self.query(queries.get_search_entries, after_pair_id),
+        )
+        return self.search_index.search_frame(query, limit)
+
+def to_arrow(df):
+    """
+    Serializes a DataFrame as an Arrow IPC stream.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def to_json(df):
+    """
+    Serializes a DataFrame as a JSON array of records.
+    """
+    return df.to_json(orient="records", date_format="iso").encode()
+
+def response_format(request):
+    """
+    Picks the response format from the 'format' parameter or the Accept header.
+    """
+    requested = request.query.get("format")
+    if requested is None:
+        requested = "arrow" if "application/vnd.apache.arrow" in request.headers.get("Accept", "") else "json"
+    if requested not in ("arrow", "json"):
+        raise web.HTTPBadRequest(text="format must be 'arrow' or 'json'")
+    return requested
+
+def etag_matches(if_none_match, etag):
+    """
+    Returns whether an If-None-Match header lists an ETag, or is '*'. Tags are
+    compared weakly, ignoring a 'W/' prefix, as If-None-Match requires.
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+def parse_num_minutes(value):
+    """
+    Validates a timeframe parameter.
+    """
+    try:
+        num_minutes = int(value)
+    except (TypeError, ValueError):
+        num_minutes = None
+    if num_minutes not in TIMEFRAMES:
+        raise web.HTTPBadRequest(text=f"num_minutes must be one of {TIMEFRAMES}")
+    return num_minutes
+
+def parse_limit(value, maximum=100):
+    """
+    Validates a result count parameter.
+    """
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = None
+    if limit is None or not 1 <= limit <= maximum:
+        raise web.HTTPBadRequest(text=f"limit must be between 1 and {maximum}")
+    return limit
+
+async def respond(request, key, compute, not_found=False):
+    """
+    Serves a cached result in the requested format, with an ETag tied to the snapshot
+    and a 304 when the client already has it.
+    """
+    service = request.app["service"]
+    fmt = response_format(request)
+    manifest = await asyncio.to_thread(service.manifest)
+    snapshot = manifest["snapshot"]
+    if snapshot is None:
+        raise web.HTTPServiceUnavailable(text="No data has been collected yet")
+
+    etag = f'"{snapshot.isoformat()}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(request.headers.get("If-None-Match", ""), etag):
+        return web.Response(status=304, headers=headers)
+
+    def compute_body():
+        df = service.cached(snapshot, key, compute)
+        if not_found and df.empty:
+            return None
+        return to_arrow(df) if fmt == "arrow" else to_json(df)
+
+    # The serialized body is cached too, so polling clients cost a dict lookup
+    body = await asyncio.to_thread(service.cached, snapshot, (*key, fmt), compute_body)
+    if body is None:
+        raise web.HTTPNotFound(text="Pair not found")
+    content_type = ARROW_CONTENT_TYPE if fmt == "arrow" else JSON_CONTENT_TYPE
+    return web.Response(body=body, headers=headers, content_type=content_type)
+
+async def get_summary(request):
+    service = request.app["service"]
+    num_minutes = parse_num_minutes(request.match_info["num_minutes"])
+    return await respond(request, ("summary", num_minutes), lambda: service.summary(num_minutes))
+
+async def get_pair(request):
+    service = request.app["service"]
+    pair_address = request.match_info["pair_address"]
+    num_minutes = parse_num_minutes(request.query.get("num_minutes", 60))
+    return await respond(
+        request,
+        ("pair_details", pair_address, num_minutes),
+        lambda: service.pair_details(pair_address, num_minutes),
+        not_found=True,
+    )
+
+async def get_pair_token(request):
+    service = request.app["service"]
+    pair_address = request.match_info["pair_address"]
+    return await respond(request, ("token", pair_address), lambda: service.token(pair_address), not_found=True)
+
+async def get_token_pairs(request):
+    service = request.app["service"]
+    mint = request.match_info["mint"]
+    return await respond(request, ("token_pairs", mint), lambda: service.token_pairs(mint))
+
+async def get_search(request):
+    service = request.app["service"]
+    query = request.query.get("q", "").strip()
+    if query == "":
+        raise web.HTTPBadRequest(text="q is required")
+    limit = parse_limit(request.query.get("limit", 20))
+    return await respond(request, ("search", query.lower(), limit), lambda: service.search(query, limit))
+
+async def get_health(request):
+    return web.json_response({"status": "ok"})
+
+async def get_metrics(request):
+    return web.Response(text=metrics.REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+@web.middleware
+async def observe_requests(request, handler):
+    """
+    Records the latency of every request by route and status code.
+    """
+    route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start_time, route=route, status=status)
+
+def create_app(service=None):
+    """
+    Creates the aiohttp application.
+    """
+    app = web.Application(middlewares=[observe_requests])
+    app["service"] = service or DataService()
+    app.router.add_get("/health", get_health)
+    app.router.add_get("/metrics", get_metrics)
+    app.router.add_get("/summary/{num_minutes}", get_summary)
+    app.router.add_get("/pairs/{pair_address}", get_pair)
+    app.router.add_get("/pairs/{pair_address}/token", get_pair_token)
+    app.router.add_get("/tokens/{mint}/pairs", get_token_pairs)
+    app.router.add_get("/search", get_search)
+    return app
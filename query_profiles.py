@@ -0,0 +1,53 @@
+import argparse
+from datetime import datetime, timedelta
+from meteora_project import config
+from meteora_project.profiling import format_operator_tree, read_profiles, summarize_profiles
+
+def print_summary(summary, top):
+    """
+    Prints the slowest queries of the slow query log.
+    """
+    print(f"{'query':<12} {'count':>6} {'total s':>9} {'mean s':>8} {'max s':>8}  {'slowest operator':<24} caller / query")
+    for query in summary[:top]:
+        operator = query["slowest_operator"] or "-"
+        if query["slowest_operator_seconds"] is not None:
+            operator = f"{operator} ({query['slowest_operator_seconds']:.3f}s)"
+        print(
+            f"{query['query_hash']:<12} {query['count']:>6} {query['total_seconds']:>9.3f} "
+            f"{query['mean_seconds']:>8.3f} {query['max_seconds']:>8.3f}  {operator:<24} {query['caller']}"
+        )
+        print(f"{'':<12} {query['sql'][:120]}")
+
+def print_query(summary, query_hash):
+    """
+    Prints the slowest run of one query, with its parameters and operator tree.
+    """
+    matches = [query for query in summary if query["query_hash"].startswith(query_hash)]
+    if not matches:
+        raise SystemExit(f"No logged query matches '{query_hash}'.")
+    slowest = matches[0]["slowest"]
+    print(f"Query {slowest['query_hash']} from {slowest['caller']} ({slowest['process']}), logged {matches[0]['count']} times")
+    latency = f"{slowest['latency']:.3f}s" if slowest["latency"] is not None else "unknown"
+    print(f"Slowest run: {slowest['seconds']:.3f}s at {slowest['logged_at']} (DuckDB latency {latency})")
+    print(f"Parameters: {slowest['parameters']}")
+    print()
+    print(slowest["sql"].strip())
+    print()
+    print(format_operator_tree(slowest["profile"]) or "No operator tree was captured for this query.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the slow query log.")
+    parser.add_argument("--top", type=int, default=10, help="Number of queries to show")
+    parser.add_argument("--hours", type=float, default=None, help="Only include queries logged in the last N hours")
+    parser.add_argument("--query", metavar="HASH", help="Show the slowest run and operator tree of one query")
+    parser.add_argument("--path", default=config.QUERY_PROFILE_PATH, help="Slow query log directory")
+    args = parser.parse_args()
+
+    since = datetime.now() - timedelta(hours=args.hours) if args.hours is not None else None
+    summary = summarize_profiles(read_profiles(args.path, since))
+    if not summary:
+        raise SystemExit(f"No slow queries logged in {args.path}. Set QUERY_PROFILE_THRESHOLD_MS to enable the log.")
+    if args.query:
+        print_query(summary, args.query)
+    else:
+        print_summary(summary, args.top)
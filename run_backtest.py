@@ -0,0 +1,42 @@
+import argparse
+import logging
+from meteora_project import config
+from meteora_project.backtest import DEFAULT_PARAMETER_GRID, backtest, build_parameter_grid
+
+logging.basicConfig(level=config.LOG_LEVEL)
+
+def parse_grid(params):
+    """
+    Overrides the default parameter grid with 'name=v1,v2,...' arguments.
+    """
+    grid = dict(DEFAULT_PARAMETER_GRID)
+    for param in params or []:
+        name, _, values = param.partition("=")
+        if name not in grid:
+            raise SystemExit(f"Unknown parameter '{name}'. Choose from: {', '.join(grid)}")
+        grid[name] = [
+            int(value) if float(value).is_integer() else float(value)
+            for value in values.split(",") if value.strip() != ""
+        ]
+    try:
+        build_parameter_grid(grid)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    return grid
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest DLMM LP strategies over the stored pair history.")
+    parser.add_argument("--minutes", type=int, default=None, help="Number of most recent minutes to simulate (default: all)")
+    parser.add_argument("--param", action="append", metavar="NAME=V1,V2", help="Override a parameter grid dimension")
+    parser.add_argument("--capital", type=float, default=config.BACKTEST_CAPITAL, help="Position size in quote terms")
+    parser.add_argument("--workers", type=int, default=config.BACKTEST_WORKERS, help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=config.BACKTEST_CHUNK_SIZE, help="Pairs simulated per worker task")
+    args = parser.parse_args()
+
+    backtest(
+        num_minutes=args.minutes,
+        grid=parse_grid(args.param),
+        capital=args.capital,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
@@ -0,0 +1,9 @@
+import logging
+from aiohttp import web
+from meteora_project import config
+from meteora_project.server import create_app
+
+logging.basicConfig(level=config.LOG_LEVEL)
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=config.QUERY_API_HOST, port=config.QUERY_API_PORT)
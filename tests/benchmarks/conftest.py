@@ -0,0 +1,45 @@
+import os
+import shutil
+import pytest
+
+from meteora_project import config
+from mock_api import MockMeteoraAPI, serve
+from synthetic import generate_database, make_api_entries
+
+# Benchmark scale, override to profile larger deployments
+BENCH_PAIRS = int(os.getenv("BENCH_PAIRS", 200))
+BENCH_MINUTES = int(os.getenv("BENCH_MINUTES", 1440))
+BENCH_API_PAIRS = int(os.getenv("BENCH_API_PAIRS", 1000))
+BENCH_API_LATENCY = float(os.getenv("BENCH_API_LATENCY", 0.05))
+BENCH_PAGE_SIZE = int(os.getenv("BENCH_PAGE_SIZE", 100))
+
+@pytest.fixture(scope="session")
+def synthetic_db(tmp_path_factory):
+    """
+    A synthetic database with BENCH_PAIRS pairs and BENCH_MINUTES snapshots.
+    """
+    db_name = str(tmp_path_factory.mktemp("bench") / "synthetic.duckdb")
+    return generate_database(db_name, BENCH_PAIRS, BENCH_MINUTES)
+
+@pytest.fixture
+def synthetic_db_copy(synthetic_db, tmp_path):
+    """
+    A private copy of the synthetic database, for benchmarks that write to it.
+    """
+    db_name = str(tmp_path / "synthetic.duckdb")
+    shutil.copy(synthetic_db, db_name)
+    return db_name
+
+@pytest.fixture(scope="session")
+def api_entries():
+    return make_api_entries(BENCH_API_PAIRS)
+
+@pytest.fixture
+def mock_api(api_entries, monkeypatch):
+    """
+    Points the Meteora client at a local mock API.
+    """
+    api = MockMeteoraAPI(api_entries, latency=BENCH_API_LATENCY, max_page_size=BENCH_PAGE_SIZE)
+    with serve(api) as base_url:
+        monkeypatch.setattr(config, "API_BASE_URL", base_url)
+        yield api
@@ -0,0 +1,82 @@
+# mock_api.py
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from aiohttp import web
+
+class MockMeteoraAPI:
+    """
+    Local stand-in for the Meteora DLMM API serving a fixed list of entries,
+    with tunable latency, a cap on the page size and injectable failures.
+    """
+
+    def __init__(self, entries, latency=0.0, max_page_size=1000):
+        self.entries = entries
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self.by_address = {entry["address"]: entry for entry in entries}
+        self.failures = {}
+
+    def fail_page(self, page, times=None):
+        """
+        Makes a page answer with a server error, the next 'times' requests or always.
+        """
+        self.failures[page] = times
+
+    def _should_fail(self, page):
+        if page not in self.failures:
+            return False
+        times = self.failures[page]
+        if times is not None:
+            if times <= 0:
+                return False
+            self.failures[page] = times - 1
+        return True
+
+    async def all_with_pagination(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        page = int(request.query.get("page", 0))
+        if self._should_fail(page):
+            raise web.HTTPInternalServerError()
+        limit = min(int(request.query.get("limit", 50)), self.max_page_size)
+        pairs = self.entries[page * limit:(page + 1) * limit]
+        return web.json_response({"pairs": pairs, "total": len(self.entries)})
+
+    async def pair(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        entry = self.by_address.get(request.match_info["address"])
+        if entry is None:
+            raise web.HTTPNotFound()
+        return web.json_response(entry)
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get("/pair/all_with_pagination", self.all_with_pagination)
+        app.router.add_get("/pair/{address}", self.pair)
+        return app
+
+@contextmanager
+def serve(api, host="127.0.0.1"):
+    """
+    Runs the mock API on a free local port in a background thread and yields its
+    base URL, so the code under test can use its own event loop.
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(api.create_app())
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, host, 0)
+    loop.run_until_complete(site.start())
+    port = runner.addresses[0][1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
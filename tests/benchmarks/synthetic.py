@@ -0,0 +1,141 @@
+# synthetic.py
+
+import argparse
+import os
+import sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from meteora_project import config
+from meteora_project.db import setup_database
+
+START_TIME = datetime(2025, 1, 1)
+BIN_STEPS = [1, 2, 5, 10, 20, 25, 50, 80, 100, 250]
+BASE_FEES = [0.01, 0.05, 0.1, 0.2, 0.25, 0.5, 1.0, 2.0, 5.0]
+
+def token_mint(index):
+    """
+    Returns a deterministic, mint-shaped address for a synthetic token.
+    """
+    return f"Tok{index:041d}"
+
+def pair_address(index):
+    """
+    Returns a deterministic, address-shaped id for a synthetic pair.
+    """
+    return f"Pair{index:040d}"
+
+def make_api_entries(num_pairs, seed=0, pct_inactive=0.2):
+    """
+    Generates entries shaped like the /pair/all_with_pagination response, sorted
+    by volume. The last 'pct_inactive' of the pairs have no fees in the last 30
+    minutes, which is where the crawl stops.
+    """
+    rng = np.random.default_rng(seed)
+    quote_mints = [config.SOL_MINT, config.USDC_MINT]
+    quote_symbols = ["SOL", "USDC"]
+    quote = rng.integers(0, 2, num_pairs)
+    volume = np.sort(rng.lognormal(8, 2, num_pairs))[::-1]
+    num_active = int(num_pairs * (1 - pct_inactive))
+
+    entries = []
+    for i in range(num_pairs):
+        fees_30 = 0 if i >= num_active else round(float(volume[i]) * 0.002, 6)
+        entries.append({
+            "address": pair_address(i),
+            "name": f"TOK{i}-{quote_symbols[quote[i]]}",
+            "mint_x": token_mint(i),
+            "mint_y": quote_mints[quote[i]],
+            "bin_step": int(rng.choice(BIN_STEPS)),
+            "base_fee_percentage": str(rng.choice(BASE_FEES)),
+            "max_fee_percentage": "10",
+            "protocol_fee_percentage": "5",
+            "liquidity": str(round(float(rng.lognormal(10, 2)), 6)),
+            "reward_mint_x": "11111111111111111111111111111111",
+            "reward_mint_y": "11111111111111111111111111111111",
+            "fees_24h": round(float(volume[i]) * 0.05, 6),
+            "today_fees": round(float(volume[i]) * 0.02, 6),
+            "trade_volume_24h": round(float(volume[i]), 6),
+            "cumulative_trade_volume": str(round(float(volume[i]) * 100, 2)),
+            "cumulative_fee_volume": str(round(float(volume[i]) * 5, 2)),
+            "current_price": float(rng.lognormal(0, 3)),
+            "apr": float(rng.uniform(0, 500)),
+            "apy": float(rng.uniform(0, 5000)),
+            "hide": False,
+            "is_blacklisted": False,
+            "fees": {"min_30": fees_30, "hour_1": fees_30 * 2, "hour_24": fees_30 * 48},
+            "fee_tvl_ratio": {"min_30": 0, "hour_1": 0, "hour_24": 0},
+            "volume": {"min_30": fees_30 * 100, "hour_1": fees_30 * 200, "hour_24": fees_30 * 4800},
+        })
+    return entries
+
+def generate_database(db_name, num_pairs, num_minutes, seed=0):
+    """
+    Creates a DuckDB database with 'num_pairs' pairs and 'num_minutes' one minute
+    snapshots of price, liquidity and fees.
+    """
+    rng = np.random.default_rng(seed)
+    conn = setup_database(db_name)
+
+    tokens_df = pd.DataFrame({
+        "mint": [config.SOL_MINT, config.USDC_MINT] + [token_mint(i) for i in range(num_pairs)],
+        "symbol": ["SOL", "USDC"] + [f"TOK{i}" for i in range(num_pairs)],
+    })
+    conn.execute("INSERT INTO tokens (mint, symbol) SELECT mint, symbol FROM tokens_df")
+
+    quote = rng.integers(0, 2, num_pairs)
+    pairs_df = pd.DataFrame({
+        "pair_address": [pair_address(i) for i in range(num_pairs)],
+        "name": [f"TOK{i}-{['SOL', 'USDC'][quote[i]]}" for i in range(num_pairs)],
+        "mint_x": [token_mint(i) for i in range(num_pairs)],
+        "mint_y": [[config.SOL_MINT, config.USDC_MINT][q] for q in quote],
+        "bin_step": rng.choice(BIN_STEPS, num_pairs),
+        "base_fee_percentage": rng.choice(BASE_FEES, num_pairs),
+    })
+    conn.execute('''
+        INSERT INTO pairs (
+            pair_address, name, mint_x_id, mint_y_id, base_mint_id, quote_mint_id,
+            bin_step, base_fee_percentage, cumulative_fee_volume
+        )
+        SELECT p.pair_address, p.name, x.id, y.id, x.id, y.id, p.bin_step, p.base_fee_percentage, 0
+        FROM pairs_df p
+            JOIN tokens x ON p.mint_x = x.mint
+            JOIN tokens y ON p.mint_y = y.mint
+    ''')
+    pair_ids = conn.execute("SELECT id FROM pairs ORDER BY id").fetchnumpy()["id"]
+
+    # Random walk prices, noisy liquidity and sparse fees per minute
+    shape = (num_pairs, num_minutes)
+    price = np.exp(np.cumsum(rng.normal(0, 0.002, shape), axis=1)) * rng.lognormal(0, 3, (num_pairs, 1))
+    liquidity = np.abs(rng.normal(1, 0.1, shape)) * rng.lognormal(10, 2, (num_pairs, 1))
+    fees = np.where(rng.random(shape) < 0.6, rng.exponential(1, shape) * liquidity * 1e-5, 0.0)
+    minutes = pd.date_range(START_TIME, periods=num_minutes, freq="min").to_numpy()
+
+    # Insert a chunk of minutes at a time to bound memory
+    chunk = max(1, 1_000_000 // max(num_pairs, 1))
+    for start in range(0, num_minutes, chunk):
+        stop = min(start + chunk, num_minutes)
+        history_df = pd.DataFrame({
+            "created_at": np.repeat(minutes[start:stop], num_pairs),
+            "pair_id": np.tile(pair_ids, stop - start),
+            "price": price[:, start:stop].T.ravel(),
+            "liquidity": liquidity[:, start:stop].T.ravel(),
+            "fees": fees[:, start:stop].T.ravel(),
+        })
+        conn.execute("INSERT INTO pair_history SELECT * FROM history_df")
+
+    conn.commit()
+    conn.close()
+    return db_name
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic pair_history database.")
+    parser.add_argument("db_name", help="Path of the DuckDB database to create")
+    parser.add_argument("--pairs", type=int, default=1000, help="Number of pairs")
+    parser.add_argument("--minutes", type=int, default=1440, help="Number of one minute snapshots")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    generate_database(args.db_name, args.pairs, args.minutes, args.seed)
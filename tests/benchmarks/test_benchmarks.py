@@ -0,0 +1,138 @@
+import asyncio
+import os
+import subprocess
+import sys
+import duckdb
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from meteora_project import queries
+from meteora_project.analytics import analyze_opportunities, correlation_matrix
+from meteora_project.apis.meteora_dlmm import fetch_paginated_data
+from meteora_project.db import insert_meteora_api_entries, setup_database
+from meteora_project.search import SearchIndex
+from conftest import BENCH_MINUTES, BENCH_PAIRS
+from synthetic import START_TIME, pair_address
+from datetime import timedelta
+
+def test_fetch_paginated_data(benchmark, mock_api, api_entries):
+    results, report = benchmark.pedantic(
+        lambda: asyncio.run(fetch_paginated_data(limit=mock_api.max_page_size)),
+        rounds=3,
+        iterations=1,
+    )
+    # The crawl ends on the page holding the first pair without fees in the last 30 minutes
+    page_size = mock_api.max_page_size
+    num_active = sum(1 for entry in api_entries if entry["fees"]["min_30"] != 0)
+    last_page = num_active // page_size
+    assert [pair["address"] for pair in results] == [entry["address"] for entry in api_entries[:(last_page + 1) * page_size]]
+    assert report == {"pages": last_page + 1, "failed_pages": 0, "duplicates": 0, "complete": True}
+
+def test_insert_meteora_api_entries(benchmark, synthetic_db_copy, api_entries):
+    conn = duckdb.connect(synthetic_db_copy)
+    snapshots = iter(range(1, 1000))
+    inserted = []
+
+    def insert():
+        created_at = START_TIME + timedelta(days=30, minutes=next(snapshots))
+        insert_meteora_api_entries(conn, api_entries, created_at)
+        inserted.append(created_at)
+
+    benchmark.pedantic(insert, rounds=5, iterations=1)
+    # Synthetic pairs and API entries share addresses, so only the extra entries are new pairs
+    assert conn.execute("SELECT count(*) FROM pairs").fetchone()[0] == max(BENCH_PAIRS, len(api_entries))
+    new_history = conn.execute("SELECT count(*) FROM pair_history WHERE created_at > ?", [START_TIME + timedelta(days=30)]).fetchone()[0]
+    assert new_history == len(inserted) * len(api_entries)
+    conn.close()
+
+def test_setup_database(benchmark, synthetic_db_copy):
+    benchmark.pedantic(lambda: setup_database(synthetic_db_copy).close(), rounds=5, iterations=1)
+    conn = duckdb.connect(synthetic_db_copy, read_only=True)
+    assert conn.execute("SELECT count(*) FROM pair_history").fetchone()[0] == BENCH_PAIRS * BENCH_MINUTES
+    assert conn.execute("SELECT count(*) FROM pairs WHERE base_mint_id IS NULL").fetchone()[0] == 0
+    conn.close()
+
+@pytest.mark.parametrize("num_minutes", [5, 60, 1440])
+def test_get_summary_data(benchmark, synthetic_db, num_minutes):
+    conn = duckdb.connect(synthetic_db, read_only=True)
+    summary_data = benchmark.pedantic(
+        queries.get_summary_data, args=(conn, num_minutes), rounds=5, iterations=1
+    )
+    conn.close()
+    # Every synthetic pair has a snapshot every minute
+    expected = BENCH_PAIRS if num_minutes <= BENCH_MINUTES else 0
+    assert sorted(summary_data["pair_address"]) == sorted(pair_address(i) for i in range(BENCH_PAIRS))[:expected]
+
+@pytest.mark.parametrize("num_minutes", [60, 1440])
+def test_get_pair_details(benchmark, synthetic_db, num_minutes):
+    conn = duckdb.connect(synthetic_db, read_only=True)
+    pair_address = conn.execute("SELECT pair_address FROM pairs ORDER BY id LIMIT 1").fetchone()[0]
+    pair_details = benchmark.pedantic(
+        queries.get_pair_details, args=(conn, pair_address, num_minutes), rounds=5, iterations=1
+    )
+    conn.close()
+    assert len(pair_details) == min(num_minutes, BENCH_MINUTES)
+    assert (pair_details["pair_address"] == pair_address).all()
+    assert pair_details["dttm"].is_monotonic_increasing
+
+@pytest.mark.parametrize("num_pairs", [200, 2000])
+def test_correlation_matrix(benchmark, num_pairs):
+    returns = np.random.default_rng(0).normal(size=(1439, num_pairs)).astype(np.float32)
+    correlation = benchmark.pedantic(correlation_matrix, args=(returns,), rounds=5, iterations=1)
+    assert correlation.shape == (num_pairs, num_pairs)
+    assert np.allclose(np.diag(correlation), 1, atol=1e-4)
+
+def test_analyze_opportunities(benchmark, synthetic_db):
+    conn = duckdb.connect(synthetic_db, read_only=True)
+    summary_data = queries.get_summary_data(conn, 1440, ["pair_address", "liquidity"])
+    pair_analytics = benchmark.pedantic(
+        analyze_opportunities, args=(conn, summary_data, 1440), rounds=5, iterations=1
+    )
+    conn.close()
+    assert pair_analytics["correlation"].shape == (len(summary_data), len(summary_data))
+    assert np.allclose(np.diag(pair_analytics["correlation"]), 1, atol=1e-4)
+
+@pytest.mark.parametrize("match", ["symbol", "prefix", "typo"])
+def test_search_index(benchmark, synthetic_db, match):
+    conn = duckdb.connect(synthetic_db, read_only=True)
+    index = SearchIndex()
+    index.add(queries.get_search_entries(conn))
+    name = conn.execute("SELECT name FROM pairs WHERE pair_address = ?", [pair_address(12)]).fetchone()[0]
+    conn.close()
+    # An exact quote symbol, the prefix of a base symbol, and a pair name with two letters swapped
+    query = {"symbol": "sol", "prefix": "TOK12", "typo": name[:-2] + name[-1] + name[-2]}[match]
+    results = benchmark.pedantic(index.search, args=(query,), rounds=100, iterations=10)
+    if match == "symbol":
+        assert len(results) == 20
+        assert all("SOL" in (result["base_symbol"], result["quote_symbol"]) for result in results)
+    else:
+        assert results[0]["pair_address"] == pair_address(12)
+    if match == "prefix":
+        # Every prefix match ranks ahead of the fuzzy ones
+        prefixed = [i for i in range(BENCH_PAIRS) if f"TOK{i}".startswith("TOK12")][:20]
+        assert {result["pair_address"] for result in results[:len(prefixed)]} == {pair_address(i) for i in prefixed}
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Modules only the collector needs, which must not load with the readers
+COLLECTOR_MODULES = {"apscheduler", "requests", "meteora_project.main", "meteora_project.apis.meteora_dlmm"}
+
+def import_modules(modules):
+    """
+    Imports modules in a fresh interpreter, returning every module it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return {line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+@pytest.mark.parametrize("modules", [
+    ["meteora_project.queries", "meteora_project.cache", "meteora_project.prewarm", "meteora_project.search", "meteora_project.analytics"],
+    ["meteora_project.server"],
+], ids=["reader_core", "query_api"])
+def test_import_time(benchmark, modules):
+    loaded = benchmark.pedantic(import_modules, args=(modules,), rounds=5, iterations=1)
+    assert loaded.isdisjoint(COLLECTOR_MODULES)
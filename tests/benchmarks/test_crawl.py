@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from tenacity import wait_none
+
+from meteora_project import config
+from meteora_project.apis import meteora_dlmm
+from meteora_project.apis.meteora_dlmm import crawl_pairs, fetch_paginated_data
+from meteora_project.budget import RateBudget
+from mock_api import MockMeteoraAPI, serve
+from synthetic import make_api_entries
+
+PAGE_SIZE = 10
+
+# 100 pairs, of which the first 80 are active, so the crawl ends on page 8
+ENTRIES = make_api_entries(100)
+NUM_ACTIVE = sum(1 for entry in ENTRIES if entry["fees"]["min_30"] != 0)
+
+def page_addresses(*pages):
+    return {entry["address"] for page in pages for entry in ENTRIES[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]}
+
+@pytest.fixture
+def flaky_api(monkeypatch):
+    """
+    A mock API that fails on demand, with the rate budget and retry waits out of the way.
+    """
+    monkeypatch.setattr(meteora_dlmm, "budget", RateBudget(1000, 1))
+    monkeypatch.setattr(meteora_dlmm.fetch_page_data.retry, "wait", wait_none())
+    monkeypatch.setattr(meteora_dlmm.fetch_pair.retry, "wait", wait_none())
+    api = MockMeteoraAPI(ENTRIES, max_page_size=PAGE_SIZE)
+    with serve(api) as base_url:
+        monkeypatch.setattr(config, "API_BASE_URL", base_url)
+        yield api
+
+def crawl(previous_addresses=()):
+    return asyncio.run(crawl_pairs(previous_addresses, limit=PAGE_SIZE))
+
+def test_crawl_complete(flaky_api):
+    results, report = crawl()
+    assert NUM_ACTIVE == 80
+    assert {pair["address"] for pair in results} == page_addresses(*range(9))
+    assert report["complete"]
+    assert report["failed_pages"] == 0
+    assert report["gap_filled"] == 0
+
+def test_failed_page_retried(flaky_api):
+    # Page 2 fails on every attempt of the crawl, then recovers in the retry round
+    flaky_api.fail_page(2, times=5)
+    results, report = crawl()
+    assert {pair["address"] for pair in results} == page_addresses(*range(9))
+    assert report["complete"]
+    assert report["failed_pages"] == 0
+
+def test_failed_page_partial_snapshot(flaky_api):
+    flaky_api.fail_page(2)
+    results, report = crawl()
+    assert {pair["address"] for pair in results} == page_addresses(*range(9)) - page_addresses(2)
+    assert not report["complete"]
+    assert report["failed_pages"] == 1
+    assert report["pages"] == 8
+
+def test_failed_batch_stops_crawl(flaky_api):
+    # A whole batch of concurrent pages fails, the pages before it are kept
+    for page in range(3, 3 + meteora_dlmm.calls):
+        flaky_api.fail_page(page)
+    results, report = asyncio.run(fetch_paginated_data(limit=PAGE_SIZE))
+    assert {pair["address"] for pair in results} == page_addresses(0, 1, 2)
+    assert not report["complete"]
+
+def test_failed_page_gap_filled(flaky_api, monkeypatch):
+    monkeypatch.setattr(config, "GAP_FILL_MAX_PAIRS", 4)
+    flaky_api.fail_page(2)
+    previous_addresses = [entry["address"] for entry in ENTRIES[:NUM_ACTIVE]]
+    results, report = crawl(previous_addresses)
+    assert not report["complete"]
+    assert report["missing"] == PAGE_SIZE
+    assert report["gap_filled"] == 4
+    filled = set(previous_addresses[2 * PAGE_SIZE:2 * PAGE_SIZE + 4])
+    assert {pair["address"] for pair in results} == page_addresses(*range(9)) - page_addresses(2) | filled
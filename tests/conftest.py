@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from contextlib import contextmanager
+import pytest
+
+HOLD_READ_LOCK = '''
+import sys, time, duckdb
+conn = duckdb.connect(sys.argv[1], read_only=True)
+print("locked", flush=True)
+time.sleep(float(sys.argv[2]))
+conn.close()
+'''
+
+@pytest.fixture
+def read_lock():
+    """
+    Holds a read only connection to a database in another process for a moment,
+    like the dashboard and the query API do.
+    """
+    @contextmanager
+    def hold(db_name, seconds=1):
+        reader = subprocess.Popen([sys.executable, "-c", HOLD_READ_LOCK, db_name, str(seconds)], stdout=subprocess.PIPE, text=True)
+        try:
+            assert reader.stdout.readline().strip() == "locked"
+            yield
+        finally:
+            reader.wait()
+    return hold
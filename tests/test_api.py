@@ -0,0 +1,146 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from meteora_project import config
+from meteora_project.db import insert_meteora_api_entries, setup_database
+from meteora_project.server import ARROW_CONTENT_TYPE, DataService, create_app, etag_matches
+
+START_TIME = datetime(2025, 1, 1)
+
+def make_entry(i, minute):
+    return {
+        "address": f"Pair{i}",
+        "name": f"TOK{i}-SOL",
+        "mint_x": f"TokMint{i}",
+        "mint_y": config.SOL_MINT,
+        "bin_step": 100,
+        "base_fee_percentage": "1",
+        "hide": False,
+        "is_blacklisted": False,
+        "current_price": 1.0 + minute / 100,
+        "liquidity": "1000",
+        "cumulative_fee_volume": str(100 + minute * (i + 1)),
+    }
+
+@pytest.fixture
+def db_name(tmp_path):
+    """
+    A database with 2 pairs and 10 one minute snapshots.
+    """
+    db_name = str(tmp_path / "meteora.duckdb")
+    conn = setup_database(db_name)
+    for minute in range(10):
+        insert_meteora_api_entries(conn, [make_entry(i, minute) for i in range(2)], START_TIME + timedelta(minutes=minute))
+    conn.close()
+    return db_name
+
+@pytest.fixture
+def empty_db_name(tmp_path):
+    db_name = str(tmp_path / "empty.duckdb")
+    setup_database(db_name).close()
+    return db_name
+
+def get(db_name, prewarm_path, path, headers=None):
+    """
+    Requests a path from the query API, returning the status, headers and body.
+    """
+    async def run():
+        client = TestClient(TestServer(create_app(DataService(db_name, str(prewarm_path)))))
+        await client.start_server()
+        try:
+            responses = []
+            for request_headers in headers if isinstance(headers, list) else [headers]:
+                response = await client.get(path, headers=request_headers or {})
+                responses.append((response.status, response.headers, await response.read()))
+            return responses if isinstance(headers, list) else responses[0]
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+def test_summary_json(db_name, tmp_path):
+    status, headers, body = get(db_name, tmp_path, "/summary/5")
+    assert status == 200
+    assert headers["Content-Type"].startswith("application/json")
+    assert headers["ETag"] == f'"{(START_TIME + timedelta(minutes=9)).isoformat()}-json"'
+    assert b'"pair_address":"Pair0"' in body and b'"pair_address":"Pair1"' in body
+
+@pytest.mark.parametrize("path, headers", [
+    ("/summary/5?format=arrow", None),
+    ("/summary/5", {"Accept": "application/vnd.apache.arrow.stream"}),
+    ("/summary/5?format=arrow", {"Accept": "application/json"}),
+])
+def test_summary_arrow(db_name, tmp_path, path, headers):
+    status, response_headers, body = get(db_name, tmp_path, path, headers)
+    assert status == 200
+    assert response_headers["Content-Type"] == ARROW_CONTENT_TYPE
+    assert response_headers["ETag"].endswith('-arrow"')
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    assert sorted(table.column("pair_address").to_pylist()) == ["Pair0", "Pair1"]
+
+def test_format_parameter_overrides_accept(db_name, tmp_path):
+    status, headers, _ = get(db_name, tmp_path, "/summary/5?format=json", {"Accept": ARROW_CONTENT_TYPE})
+    assert status == 200
+    assert headers["Content-Type"].startswith("application/json")
+
+def test_unknown_format(db_name, tmp_path):
+    status, _, _ = get(db_name, tmp_path, "/summary/5?format=csv")
+    assert status == 400
+
+def test_not_modified(db_name, tmp_path):
+    etag = get(db_name, tmp_path, "/pairs/Pair0?num_minutes=5")[1]["ETag"]
+    responses = get(db_name, tmp_path, "/pairs/Pair0?num_minutes=5", [
+        {"If-None-Match": etag},
+        {"If-None-Match": f'"other", W/{etag}'},
+        {"If-None-Match": "*"},
+        {"If-None-Match": etag[:-2] + '"'},
+        {"If-None-Match": etag.replace("json", "arrow")},
+    ])
+    assert [status for status, _, _ in responses] == [304, 304, 304, 200, 200]
+    assert responses[0][1]["ETag"] == etag
+    assert responses[0][2] == b""
+
+@pytest.mark.parametrize("header, matches", [
+    ('"a"', True),
+    ('"b", "a"', True),
+    ('W/"a"', True),
+    ("*", True),
+    ('"ab"', False),
+    ('"a', False),
+    ("", False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"a"') == matches
+
+def test_pair_details(db_name, tmp_path):
+    status, _, body = get(db_name, tmp_path, "/pairs/Pair1?num_minutes=5")
+    assert status == 200
+    assert body.count(b'"pair_address":"Pair1"') == 5
+
+def test_unknown_pair(db_name, tmp_path):
+    assert get(db_name, tmp_path, "/pairs/Unknown?num_minutes=5")[0] == 404
+    assert get(db_name, tmp_path, "/pairs/Unknown/token")[0] == 404
+
+@pytest.mark.parametrize("path", [
+    "/summary/7",
+    "/summary/abc",
+    "/pairs/Pair0?num_minutes=0",
+    "/search?q=tok&limit=0",
+    "/search?q=tok&limit=101",
+    "/search?q=tok&limit=abc",
+    "/search",
+])
+def test_bad_parameters(db_name, tmp_path, path):
+    assert get(db_name, tmp_path, path)[0] == 400
+
+def test_search(db_name, tmp_path):
+    status, _, body = get(db_name, tmp_path, "/search?q=tok1&limit=1")
+    assert status == 200
+    assert b'"pair_address":"Pair1"' in body and b"Pair0" not in body
+
+def test_empty_database(empty_db_name, tmp_path):
+    assert get(empty_db_name, tmp_path, "/summary/5")[0] == 503
+    assert get(empty_db_name, tmp_path, "/health")[0] == 200
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+import duckdb
+import numpy as np
+import pytest
+
+from meteora_project.backtest import (
+    _position_value,
+    backtest,
+    build_parameter_grid,
+    simulate_chunk,
+    trailing_signal,
+)
+from meteora_project import config
+from meteora_project.db import execute_sql_file, insert_meteora_api_entries, resolve_pair_tokens, setup_database
+
+def make_chunk(prices, fees=1.0, liquidity=100.0, bin_step=10000):
+    """
+    A single pair chunk with constant fees and liquidity every minute.
+    """
+    prices = np.array([prices], dtype=float)
+    return {
+        "price": prices,
+        "liquidity": np.full(prices.shape, liquidity),
+        "fees": np.full(prices.shape, fees),
+        "present": np.ones(prices.shape, dtype=bool),
+        "bin_step": np.array([bin_step], dtype=float),
+    }
+
+def make_grid(**params):
+    grid = {"range_bins": [2], "lookback": [2], "entry_threshold": [0], "exit_threshold": [0], "max_out_of_range": [0]}
+    grid.update({key: [value] for key, value in params.items()})
+    return grid
+
+def make_combos(**params):
+    return build_parameter_grid(make_grid(**params))
+
+def test_trailing_signal():
+    fees = np.ones((1, 4))
+    liquidity = np.full((1, 4), 100.0)
+    present = np.ones((1, 4), dtype=bool)
+    signal = trailing_signal(fees, liquidity, present, 2)
+    # 2 fees on 100 liquidity over 2 minutes, scaled to 24h; the first minute lacks history
+    assert signal[0, 0] == -np.inf
+    assert signal[0, 1:] == pytest.approx([1440, 1440, 1440])
+
+def test_trailing_signal_requires_observed_window():
+    present = np.array([[True, False, True, True]])
+    signal = trailing_signal(np.ones((1, 4)), np.full((1, 4), 100.0), present, 2)
+    assert list(signal[0, :3]) == [-np.inf, -np.inf, -np.inf]
+    assert signal[0, 3] == pytest.approx(1440)
+
+@pytest.mark.parametrize("price, expected", [
+    (1.0, 0.5),    # at the lower bound, all base
+    (2.25, 0.875), # in range, half base half quote by value
+    (4.0, 1.0),    # at the upper bound, all quote
+    (9.0, 1.0),    # above the range, still all quote
+])
+def test_position_value(price, expected):
+    assert _position_value(price, 1.0, 4.0, 1.0) == pytest.approx(expected)
+
+def test_simulate_chunk_holds_position():
+    results = simulate_chunk(make_chunk([1, 1, 1, 1]), make_combos(), capital=100)
+    # Enters on the second minute once the signal exists, and earns half the fees
+    # of the two following minutes with half of the liquidity
+    assert results["num_entries"][0, 0] == 1
+    assert results["minutes_in_position"][0, 0] == 2
+    assert results["minutes_in_range"][0, 0] == 2
+    assert results["fees_earned"][0, 0] == pytest.approx(1.0)
+    assert results["pnl"][0, 0] == pytest.approx(1.0)
+    assert results["pct_return"][0, 0] == pytest.approx(1.0)
+
+def test_simulate_chunk_exits_out_of_range():
+    results = simulate_chunk(make_chunk([1, 1, 1, 3]), make_combos(), capital=100)
+    # The range is [0.5, 2]; at 3 the position is all quote and is closed
+    value = 100 * (np.sqrt(2) - np.sqrt(0.5)) / (2 - np.sqrt(2))
+    assert results["num_entries"][0, 0] == 1
+    assert results["minutes_in_range"][0, 0] == 1
+    assert results["fees_earned"][0, 0] == pytest.approx(0.5)
+    assert results["pnl"][0, 0] == pytest.approx(value - 100 + 0.5)
+
+def test_simulate_chunk_entry_threshold():
+    results = simulate_chunk(make_chunk([1, 1, 1, 1]), make_combos(entry_threshold=2000), capital=100)
+    assert results["num_entries"][0, 0] == 0
+    assert results["pnl"][0, 0] == 0
+
+def test_build_parameter_grid_rejects_zero_lookback():
+    with pytest.raises(ValueError, match="lookback"):
+        make_combos(lookback=0)
+
+def test_backtest_without_history(tmp_path):
+    db_name = str(tmp_path / "meteora.duckdb")
+    setup_database(db_name).close()
+    assert backtest(db_name, grid=make_grid(), workers=1) is None
+
+def test_backtest_creates_its_tables_and_waits_for_reader_lock(tmp_path, read_lock):
+    db_name = str(tmp_path / "meteora.duckdb")
+    # A database set up before the backtester existed
+    conn = duckdb.connect(db_name)
+    execute_sql_file(conn, "db.sql")
+    resolve_pair_tokens(conn)
+    for minute in range(10):
+        insert_meteora_api_entries(conn, [{
+            "address": "Pair1", "name": "TOK-SOL", "mint_x": "TokMint1", "mint_y": config.SOL_MINT,
+            "bin_step": 100, "base_fee_percentage": "1", "hide": False, "is_blacklisted": False,
+            "current_price": 1.0, "liquidity": "1000", "cumulative_fee_volume": str(100 + minute),
+        }], datetime(2025, 1, 1) + timedelta(minutes=minute))
+    conn.close()
+
+    with read_lock(db_name):
+        run_id = backtest(db_name, grid=make_grid(), workers=1)
+
+    conn = duckdb.connect(db_name, read_only=True)
+    assert conn.execute("SELECT id, num_minutes, num_pairs, num_combos FROM backtest_runs").fetchall() == [(run_id, 10, 1, 1)]
+    assert conn.execute("SELECT count(*) FROM backtest_results").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,82 @@
+import asyncio
+import multiprocessing
+import time
+import pytest
+
+from meteora_project import budget
+from meteora_project.budget import PRIORITY_CRAWL, PRIORITY_HOT, RateBudget, SharedBucket
+
+def test_rate_budget_serves_by_priority():
+    rate_budget = RateBudget(calls=1, period=0.05)
+    served = []
+
+    async def request(name, priority):
+        await rate_budget.acquire(priority)
+        served.append(name)
+
+    async def run():
+        # Take the first slot so every later request has to queue
+        await rate_budget.acquire()
+        await asyncio.gather(
+            request("crawl-1", PRIORITY_CRAWL),
+            request("hot-1", PRIORITY_HOT),
+            request("crawl-2", PRIORITY_CRAWL),
+            request("hot-2", PRIORITY_HOT),
+        )
+
+    asyncio.run(run())
+    # The hot tier goes first, then each tier in arrival order
+    assert served == ["hot-1", "hot-2", "crawl-1", "crawl-2"]
+
+def test_rate_budget_spaces_requests():
+    rate_budget = RateBudget(calls=10, period=0.5)
+
+    async def run():
+        start_time = time.perf_counter()
+        await asyncio.gather(*[rate_budget.acquire() for _ in range(6)])
+        return time.perf_counter() - start_time
+
+    # The first slot starts right away, the next five follow 0.05 seconds apart
+    assert asyncio.run(run()) >= 0.25
+
+class RecordingBucket(SharedBucket):
+    """
+    Records the start of every slot it reserves.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.slots = []
+
+    def _next_slot(self, next_free, now):
+        wait, next_free = super()._next_slot(next_free, now)
+        self.slots.append(next_free - self.interval)
+        return wait, next_free
+
+def reserve_slots(path, calls, period, num_slots, slots):
+    bucket = RecordingBucket(calls, period, path)
+    for _ in range(num_slots):
+        time.sleep(bucket.reserve())
+    slots.extend(bucket.slots)
+
+@pytest.mark.skipif(budget.fcntl is None, reason="flock is not available")
+def test_shared_bucket_spaces_slots_across_processes(tmp_path):
+    calls, period = 20, 1
+    path = str(tmp_path / "ratelimit" / "meteora_dlmm.bucket")
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        slots = manager.list()
+        processes = [
+            context.Process(target=reserve_slots, args=(path, calls, period, 10, slots))
+            for _ in range(2)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+            assert process.exitcode == 0
+        slots = sorted(slots)
+
+    assert len(slots) == 20
+    gaps = [later - earlier for earlier, later in zip(slots, slots[1:])]
+    assert min(gaps) >= period / calls - 1e-6
@@ -0,0 +1,164 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from meteora_project.cache import SnapshotCache, compact_frame
+
+class CountingLoader:
+    """
+    Returns a 100 byte array for a key, counting the calls per key.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        def compute():
+            with self._lock:
+                self.calls[key] = self.calls.get(key, 0) + 1
+            time.sleep(self.delay)
+            return np.full(100, len(key), dtype=np.uint8)
+        return compute
+
+def test_hit_after_miss():
+    cache, load = SnapshotCache(max_bytes=1000), CountingLoader()
+    first = cache.get_or_compute(1, "a", load("a"))
+    assert cache.get_or_compute(1, "a", load("a")) is first
+    assert load.calls == {"a": 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_evicts_least_recently_used_by_size():
+    cache, load = SnapshotCache(max_bytes=250), CountingLoader()
+    cache.get_or_compute(1, "a", load("a"))
+    cache.get_or_compute(1, "b", load("b"))
+    cache.get_or_compute(1, "a", load("a"))
+    # Holding a third 100 byte result evicts 'b', the least recently used
+    cache.get_or_compute(1, "c", load("c"))
+    assert cache.size == 200
+    cache.get_or_compute(1, "a", load("a"))
+    cache.get_or_compute(1, "b", load("b"))
+    assert load.calls == {"a": 1, "b": 2, "c": 1}
+
+def test_does_not_cache_results_over_the_limit():
+    cache, load = SnapshotCache(max_bytes=50), CountingLoader()
+    cache.get_or_compute(1, "a", load("a"))
+    cache.get_or_compute(1, "a", load("a"))
+    assert load.calls == {"a": 2}
+    assert cache.size == 0
+
+def test_new_snapshot_invalidates():
+    cache, load = SnapshotCache(max_bytes=1000), CountingLoader()
+    cache.get_or_compute(1, "a", load("a"))
+    cache.get_or_compute(1, "b", load("b"))
+    cache.get_or_compute(2, "a", load("a"))
+    assert cache.snapshot == 2
+    assert cache.size == 100
+    cache.get_or_compute(2, "b", load("b"))
+    assert load.calls == {"a": 2, "b": 2}
+
+def test_result_of_an_old_snapshot_is_not_stored():
+    cache = SnapshotCache(max_bytes=1000)
+
+    def compute():
+        # A newer snapshot is seen while this result is computed
+        cache.get_or_compute(2, "b", lambda: np.zeros(10, dtype=np.uint8))
+        return np.zeros(100, dtype=np.uint8)
+
+    cache.get_or_compute(1, "a", compute)
+    assert cache.snapshot == 2
+    assert cache.size == 10
+
+def test_single_flight():
+    cache, load = SnapshotCache(max_bytes=1000), CountingLoader(delay=0.2)
+    barrier = threading.Barrier(8)
+
+    def request():
+        barrier.wait()
+        return cache.get_or_compute(1, "a", load("a"))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: request(), range(8)))
+    assert load.calls == {"a": 1}
+    assert all(result is results[0] for result in results)
+    assert (cache.hits, cache.misses) == (7, 1)
+
+def test_failed_computation_releases_waiters():
+    cache = SnapshotCache(max_bytes=1000)
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("query failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        failing = executor.submit(cache.get_or_compute, 1, "a", fail)
+        started.wait()
+        # The waiter computes the value itself once the first computation fails
+        waiting = executor.submit(cache.get_or_compute, 1, "a", lambda: "ok")
+        with pytest.raises(RuntimeError):
+            failing.result()
+        assert waiting.result() == "ok"
+
+def test_compact_frame_floats():
+    df = pd.DataFrame({
+        "price": [12.34, 0.1],
+        "halves": [0.5, np.nan],
+        "whole": [1.0, 300.0],
+        "large": [1e12, 2.0],
+    })
+    compact = compact_frame(df)
+    # Values float32 cannot hold exactly keep their precision
+    assert compact["price"].dtype == np.float64
+    assert compact["price"].tolist() == [12.34, 0.1]
+    assert compact["halves"].dtype == np.float32
+    assert compact["halves"].isna().tolist() == [False, True]
+    # Whole floats become the smallest integer that holds them
+    assert compact["whole"].dtype == np.int16
+    assert compact["large"].dtype == np.int64
+    assert compact["whole"].tolist() == [1, 300]
+
+def test_compact_frame_booleans():
+    df = pd.DataFrame({"flag": [True, False, True], "maybe": [True, None, False]})
+    compact = compact_frame(df)
+    assert compact["flag"].dtype == bool
+    assert compact["maybe"].dtype == bool
+    assert compact["maybe"].tolist() == [True, False, False]
+
+def test_compact_frame_strings():
+    df = pd.DataFrame({
+        "quote": ["SOL", "SOL", "USDC", "SOL"],
+        "address": ["a", "b", "c", "d"],
+    })
+    compact = compact_frame(df)
+    # Repeated values are stored once as categories, unique ones as Arrow strings
+    assert isinstance(compact["quote"].dtype, pd.CategoricalDtype)
+    assert compact["address"].dtype == pd.StringDtype("pyarrow")
+    assert compact["quote"].tolist() == df["quote"].tolist()
+    assert compact["address"].tolist() == df["address"].tolist()
+
+def test_compact_frame_arrow_backed():
+    table = pa.table({
+        "price": pa.array([12.34, 1.5]),
+        "fees": pa.array([0.5, None], pa.float64()),
+        "count": pa.array([1, 2], pa.int64()),
+        "name": pa.array(["a", "b"]),
+        "flag": pa.array([True, False]),
+    })
+    compact = compact_frame(table.to_pandas(types_mapper=pd.ArrowDtype))
+    assert compact["price"].dtype == np.float64
+    assert compact["fees"].dtype == np.float32
+    assert compact["count"].dtype == np.int8
+    assert compact["name"].dtype == pd.StringDtype("pyarrow")
+    assert compact["flag"].dtype == bool
+    assert compact["price"].tolist() == [12.34, 1.5]
+
+def test_compact_frame_selects_columns():
+    df = pd.DataFrame({"a": [1, 2], "b": [3, 4]})
+    assert list(compact_frame(df, ["b", "missing"]).columns) == ["b"]
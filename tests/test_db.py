@@ -0,0 +1,75 @@
+from datetime import datetime
+import pytest
+
+from meteora_project import config
+from meteora_project.db import insert_meteora_api_entries, resolve_pair_tokens, setup_database
+
+OTHER_MINT = "Other111111111111111111111111111111111111111"
+TOKEN_MINT = "Token111111111111111111111111111111111111111"
+
+# (name, mint_x, mint_y, base, quote), with QUOTE_MINTS ordered USDC, USDT, SOL
+PAIRS = [
+    ("SOL-USDC", config.SOL_MINT, config.USDC_MINT, config.SOL_MINT, config.USDC_MINT),
+    ("USDC-SOL", config.USDC_MINT, config.SOL_MINT, config.SOL_MINT, config.USDC_MINT),
+    ("USDT-USDC", config.USDT_MINT, config.USDC_MINT, config.USDT_MINT, config.USDC_MINT),
+    ("SOL-USDT", config.SOL_MINT, config.USDT_MINT, config.SOL_MINT, config.USDT_MINT),
+    ("SOL-TOKEN", config.SOL_MINT, TOKEN_MINT, TOKEN_MINT, config.SOL_MINT),
+    # Neither token is listed, so Y is the quote token
+    ("TOKEN-OTHER", TOKEN_MINT, OTHER_MINT, TOKEN_MINT, OTHER_MINT),
+]
+
+def make_entry(name, mint_x, mint_y):
+    return {
+        "address": name,
+        "name": name,
+        "mint_x": mint_x,
+        "mint_y": mint_y,
+        "bin_step": 10,
+        "base_fee_percentage": "0.1",
+        "hide": False,
+        "is_blacklisted": False,
+        "current_price": 1.0,
+        "liquidity": "1000",
+        "cumulative_fee_volume": "100",
+    }
+
+def get_pair_tokens(conn):
+    return dict(((name, (base, quote)) for name, base, quote in conn.execute('''
+        SELECT p.pair_address, b.mint, q.mint
+        FROM pairs p
+            JOIN tokens b ON p.base_mint_id = b.id
+            JOIN tokens q ON p.quote_mint_id = q.id
+    ''').fetchall()))
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = setup_database(str(tmp_path / "meteora.duckdb"))
+    insert_meteora_api_entries(conn, [make_entry(*pair[:3]) for pair in PAIRS], datetime(2025, 1, 1))
+    yield conn
+    conn.close()
+
+def test_quote_mint_priority(conn):
+    assert config.QUOTE_MINTS == [config.USDC_MINT, config.USDT_MINT, config.SOL_MINT]
+    assert get_pair_tokens(conn) == {name: (base, quote) for name, _, _, base, quote in PAIRS}
+
+def test_backfill_pair_tokens(conn):
+    # Pairs stored before base and quote tokens were tracked, and before their indexes
+    conn.execute("DROP INDEX pairs_base_mint_id_IDX")
+    conn.execute("DROP INDEX pairs_quote_mint_id_IDX")
+    conn.execute("UPDATE pairs SET base_mint_id = NULL, quote_mint_id = NULL WHERE pair_address IN ('USDC-SOL', 'TOKEN-OTHER')")
+    assert len(get_pair_tokens(conn)) == len(PAIRS) - 2
+
+    resolve_pair_tokens(conn)
+    assert get_pair_tokens(conn) == {name: (base, quote) for name, _, _, base, quote in PAIRS}
+    indexes = {row[0] for row in conn.execute("SELECT index_name FROM duckdb_indexes() WHERE table_name = 'pairs'").fetchall()}
+    assert {"pairs_base_mint_id_IDX", "pairs_quote_mint_id_IDX"} <= indexes
+
+def test_backfill_leaves_resolved_pairs(tmp_path):
+    db_name = str(tmp_path / "meteora.duckdb")
+    conn = setup_database(db_name)
+    insert_meteora_api_entries(conn, [make_entry(*PAIRS[0][:3])], datetime(2025, 1, 1))
+    conn.close()
+    # Setting up the database again keeps the resolved tokens
+    conn = setup_database(db_name)
+    assert get_pair_tokens(conn) == {"SOL-USDC": (config.SOL_MINT, config.USDC_MINT)}
+    conn.close()
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime
+import duckdb
+
+from meteora_project import config, enrichment
+from meteora_project.db import insert_meteora_api_entries, setup_database
+
+ENTRY = {
+    "address": "Pair1",
+    "name": "TOK-SOL",
+    "mint_x": "TokMint1",
+    "mint_y": config.SOL_MINT,
+    "bin_step": 100,
+    "base_fee_percentage": "1",
+    "hide": False,
+    "is_blacklisted": False,
+    "current_price": 2.5,
+    "liquidity": "1000",
+    "cumulative_fee_volume": "100",
+}
+
+def test_enrichment_waits_for_reader_lock(tmp_path, monkeypatch, read_lock):
+    db_name = str(tmp_path / "meteora.duckdb")
+    conn = setup_database(db_name)
+    insert_meteora_api_entries(conn, [ENTRY], datetime(2025, 1, 1))
+    conn.close()
+
+    async def get_organic_scores(mints):
+        return {mint: 87 for mint in mints}
+
+    monkeypatch.setattr(enrichment, "get_top_pair_addresses", lambda num_pairs, num_minutes: ["Pair1"])
+    monkeypatch.setattr(enrichment, "get_organic_scores", get_organic_scores)
+    with read_lock(db_name):
+        asyncio.run(enrichment.enrich_token_metadata(db_name))
+
+    conn = duckdb.connect(db_name, read_only=True)
+    scores = conn.execute('''
+        SELECT t.mint, m.organic_score FROM token_metadata m JOIN tokens t ON m.token_id = t.id
+    ''').fetchall()
+    conn.close()
+    # Only the base token is enriched
+    assert scores == [("TokMint1", 87)]
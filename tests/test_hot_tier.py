@@ -0,0 +1,76 @@
+import threading
+from datetime import datetime, timedelta
+import duckdb
+
+from meteora_project import config
+from meteora_project.db import insert_hot_entries, insert_meteora_api_entries, setup_database
+from meteora_project.hot_tier import write_hot_snapshot
+
+def make_entry(address, cumulative_fee_volume):
+    return {
+        "address": address,
+        "name": "WATCH-SOL",
+        "mint_x": "Watch1111111111111111111111111111111111111",
+        "mint_y": config.SOL_MINT,
+        "bin_step": 100,
+        "base_fee_percentage": "1",
+        "hide": False,
+        "is_blacklisted": False,
+        "current_price": 2.5,
+        "liquidity": "1000",
+        "cumulative_fee_volume": str(cumulative_fee_volume),
+    }
+
+def test_hot_snapshot_adds_unknown_pairs(tmp_path):
+    db_name = str(tmp_path / "meteora.duckdb")
+    setup_database(db_name).close()
+    created_at = datetime(2025, 1, 1)
+
+    # A watchlisted pair the crawl has not stored yet
+    assert write_hot_snapshot([make_entry("Watched", 100)], created_at, db_name) == 1
+    assert write_hot_snapshot([make_entry("Watched", 104)], created_at + timedelta(seconds=15), db_name) == 1
+
+    conn = duckdb.connect(db_name, read_only=True)
+    assert conn.execute("SELECT name FROM pairs WHERE pair_address = 'Watched'").fetchall() == [("WATCH-SOL",)]
+    fees = conn.execute("SELECT fees FROM pair_history_hires ORDER BY created_at").fetchall()
+    conn.close()
+    assert fees == [(None,), (4.0,)]
+
+def test_hot_snapshot_waits_for_reader_lock(tmp_path, read_lock):
+    db_name = str(tmp_path / "meteora.duckdb")
+    setup_database(db_name).close()
+    with read_lock(db_name):
+        assert write_hot_snapshot([make_entry("Watched", 100)], datetime(2025, 1, 1), db_name) == 1
+
+def test_hot_tier_and_crawl_add_the_same_new_pair(tmp_path):
+    db_name = str(tmp_path / "meteora.duckdb")
+    setup_database(db_name).close()
+    crawl_conn, hot_conn = duckdb.connect(db_name), duckdb.connect(db_name)
+    errors = []
+
+    def insert(write, conn, entry, created_at, barrier):
+        barrier.wait()
+        try:
+            write(conn, [entry], created_at)
+        except Exception as e:
+            errors.append(e)
+
+    # Both threads see a pair that is not stored yet, in the same instant
+    for i in range(20):
+        entry = make_entry(f"New{i}", 100) | {"mint_x": f"NewMint{i}"}
+        created_at = datetime(2025, 1, 1) + timedelta(minutes=i)
+        barrier = threading.Barrier(2)
+        threads = [
+            threading.Thread(target=insert, args=(insert_meteora_api_entries, crawl_conn, entry, created_at, barrier)),
+            threading.Thread(target=insert, args=(insert_hot_entries, hot_conn, entry, created_at, barrier)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert crawl_conn.execute("SELECT count(*) FROM pairs").fetchone()[0] == 20
+    assert crawl_conn.execute("SELECT count(*) FROM pair_history").fetchone()[0] == 20
+    crawl_conn.close()
+    hot_conn.close()
@@ -0,0 +1,42 @@
+import asyncio
+import time
+from datetime import datetime
+import duckdb
+
+from meteora_project import config, main
+from meteora_project.db import setup_database
+
+def test_write_snapshot_waits_for_reader_lock(tmp_path, monkeypatch, read_lock):
+    db_name = str(tmp_path / "meteora.duckdb")
+    setup_database(db_name).close()
+    monkeypatch.setattr(config, "DB_FILENAME", db_name)
+
+    job_run = {"started_at": datetime.now(), "created_at": datetime(2025, 1, 1), "status": "empty"}
+    with read_lock(db_name):
+        main.write_snapshot(job_run, None, time.perf_counter())
+
+    assert job_run["status"] == "empty"
+    conn = duckdb.connect(db_name, read_only=True)
+    assert conn.execute("SELECT status FROM job_runs").fetchall() == [("empty",)]
+    conn.close()
+
+def test_run_writer_survives_failed_write(monkeypatch):
+    written = []
+
+    def write_snapshot(job_run, data, job_start):
+        if data is None:
+            raise RuntimeError("write failed")
+        written.append(job_run["created_at"])
+
+    monkeypatch.setattr(main, "write_snapshot", write_snapshot)
+
+    async def run():
+        write_queue = asyncio.Queue()
+        writer = asyncio.create_task(main.run_writer(write_queue))
+        await write_queue.put(({"created_at": 1}, None, 0))
+        await write_queue.put(({"created_at": 2}, [{}], 0))
+        await asyncio.wait_for(write_queue.join(), timeout=5)
+        writer.cancel()
+
+    asyncio.run(run())
+    assert written == [2]
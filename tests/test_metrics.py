@@ -0,0 +1,99 @@
+import functools
+import os
+import time
+from datetime import datetime
+import duckdb
+
+from meteora_project import config, main, metrics
+from meteora_project.db import setup_database
+from meteora_project.prewarm import prewarm_summaries
+
+def test_counter_and_gauge_text():
+    requests = metrics.Counter("api_requests_total", "API requests", ["endpoint", "status"])
+    requests.inc(endpoint="pair", status="ok")
+    requests.inc(2, endpoint="pair", status="ok")
+    requests.inc(endpoint='a"b', status="error")
+    last_pairs = metrics.Gauge("last_pairs", "Pairs in the last run")
+    last_pairs.set(1250.0)
+
+    assert requests.render() == "\n".join([
+        "# HELP api_requests_total API requests",
+        "# TYPE api_requests_total counter",
+        'api_requests_total{endpoint="a\\"b",status="error"} 1',
+        'api_requests_total{endpoint="pair",status="ok"} 3',
+    ])
+    assert last_pairs.render() == "\n".join([
+        "# HELP last_pairs Pairs in the last run",
+        "# TYPE last_pairs gauge",
+        "last_pairs 1250",
+    ])
+    assert requests.total() == 4
+
+def test_histogram_text():
+    seconds = metrics.Histogram("stage_seconds", "Stage duration", ["stage"], buckets=(0.1, 1))
+    seconds.observe(0.05, stage="fetch")
+    seconds.observe(0.5, stage="fetch")
+    seconds.observe(2.5, stage="fetch")
+
+    assert seconds.render() == "\n".join([
+        "# HELP stage_seconds Stage duration",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'stage_seconds_bucket{stage="fetch",le="1"} 2',
+        'stage_seconds_bucket{stage="fetch",le="+Inf"} 3',
+        'stage_seconds_sum{stage="fetch"} 3.05',
+        'stage_seconds_count{stage="fetch"} 3',
+    ])
+    assert seconds.get(stage="fetch") == (3, 3.05)
+
+def test_registry_reuses_metrics():
+    registry = metrics.Registry()
+    first = registry.register(metrics.Counter("runs_total", "Runs"))
+    assert registry.register(metrics.Counter("runs_total", "Runs")) is first
+
+def test_write_textfile(tmp_path, monkeypatch):
+    registry = metrics.Registry()
+    registry.register(metrics.Gauge("dashboard_sessions", "Open sessions")).set(2)
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+
+    metrics.write_textfile("dashboard", str(tmp_path))
+    assert os.listdir(tmp_path) == ["dashboard.prom"]
+    text = (tmp_path / "dashboard.prom").read_text()
+    assert text == "# HELP dashboard_sessions Open sessions\n# TYPE dashboard_sessions gauge\ndashboard_sessions 2\n"
+
+    # The collector serves its own metrics followed by the textfiles
+    collector = metrics.Registry()
+    collector.register(metrics.Counter("collector_runs_total", "Runs")).inc()
+    monkeypatch.setattr(metrics, "REGISTRY", collector)
+    assert metrics.render_all(str(tmp_path)) == collector.render() + text
+
+ENTRY = {
+    "address": "Pair1", "name": "TOK-SOL", "mint_x": "TokMint1", "mint_y": config.SOL_MINT,
+    "bin_step": 100, "base_fee_percentage": "1", "hide": False, "is_blacklisted": False,
+    "current_price": 1.0, "liquidity": "1000", "cumulative_fee_volume": "100",
+}
+
+def test_job_runs(tmp_path, monkeypatch):
+    db_name = str(tmp_path / "meteora.duckdb")
+    setup_database(db_name).close()
+    monkeypatch.setattr(config, "DB_FILENAME", db_name)
+    monkeypatch.setattr(main, "prewarm_summaries", functools.partial(prewarm_summaries, prewarm_path=str(tmp_path / "prewarm")))
+
+    report = {"pages": 1, "failed_pages": 0, "duplicates": 0, "gap_filled": 0, "complete": True}
+    ok_run = {"started_at": datetime.now(), "created_at": datetime.now(), "status": "error", **report}
+    main.write_snapshot(ok_run, [ENTRY], time.perf_counter())
+    # An entry without the API fields fails while loading
+    failed_run = {"started_at": datetime.now(), "created_at": datetime(2025, 1, 1), "status": "error", **report}
+    main.write_snapshot(failed_run, [{"address": "Pair2"}], time.perf_counter())
+
+    conn = duckdb.connect(db_name, read_only=True)
+    rows = conn.execute('''
+        SELECT status, error, num_pairs, new_pairs, history_rows, total_seconds
+        FROM job_runs ORDER BY id
+    ''').fetchall()
+    conn.close()
+    assert ok_run["status"] == "ok"
+    assert rows[0][:5] == ("ok", None, 1, 1, 1)
+    assert rows[1][0] == "error"
+    assert "cumulative_fee_volume" in rows[1][1]
+    assert all(row[5] > 0 for row in rows)
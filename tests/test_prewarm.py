@@ -0,0 +1,126 @@
+import os
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+
+from meteora_project import config
+from meteora_project.db import insert_meteora_api_entries, setup_database
+from meteora_project.prewarm import (
+    _atomic_write,
+    get_top_pair_addresses,
+    prewarm_summaries,
+    read_arrow,
+    read_manifest,
+    read_summary,
+    summary_path,
+    write_arrow,
+    write_manifest,
+)
+
+def write_summary(prewarm_path, num_minutes, scores):
+    write_arrow(summary_path(num_minutes, prewarm_path), pd.DataFrame({
+        "pair_address": list(scores),
+        "pct_geek_fees_liquidity_24h": list(scores.values()),
+    }))
+
+def test_arrow_round_trip(tmp_path):
+    df = pd.DataFrame({
+        "pair_address": ["a", "b"],
+        "liquidity": [1.5, None],
+        "bin_step": [10, 100],
+        "dttm": pd.to_datetime(["2025-01-01 00:00", "2025-01-01 00:01"]),
+    })
+    path = str(tmp_path / "summary_5.arrow")
+    write_arrow(path, df)
+    assert os.listdir(tmp_path) == ["summary_5.arrow"]
+    result = read_arrow(path)
+    # Columns come back Arrow backed, with the same values
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in result.dtypes)
+    assert result["pair_address"].tolist() == ["a", "b"]
+    assert result["liquidity"].isna().tolist() == [False, True]
+    assert result["liquidity"][0] == 1.5
+    assert result["bin_step"].tolist() == [10, 100]
+    assert (result["dttm"].astype("datetime64[ns]") == df["dttm"]).all()
+
+def test_arrow_write_is_atomic(tmp_path):
+    path = str(tmp_path / "summary_5.arrow")
+    write_arrow(path, pd.DataFrame({"pair_address": ["a"]}))
+
+    def write_half(tmp_path):
+        with open(tmp_path, "wb") as partial:
+            partial.write(b"ARROW1")
+        raise OSError("disk full")
+
+    # A write that fails half way leaves the previous file in place and no temporary file
+    with pytest.raises(OSError):
+        _atomic_write(path, write_half)
+    assert os.listdir(tmp_path) == ["summary_5.arrow"]
+    assert read_arrow(path)["pair_address"].tolist() == ["a"]
+
+def test_manifest_round_trip(tmp_path):
+    snapshot = datetime(2025, 1, 1, 12, 30)
+    write_manifest({
+        "snapshot": snapshot.isoformat(),
+        "update_count": 60,
+        "timeframes": [5, 15, 30, 60],
+        "partial_snapshots": {5: 0, 60: 2},
+    }, str(tmp_path))
+    assert read_manifest(str(tmp_path)) == {
+        "snapshot": snapshot,
+        "update_count": 60,
+        "timeframes": [5, 15, 30, 60],
+        "partial_snapshots": {5: 0, 60: 2},
+    }
+
+def test_missing_or_corrupt_manifest(tmp_path):
+    assert read_manifest(str(tmp_path)) is None
+    (tmp_path / "manifest.json").write_text('{"snapshot": ')
+    assert read_manifest(str(tmp_path)) is None
+
+def test_top_pairs_from_requested_timeframe(tmp_path):
+    write_summary(str(tmp_path), 30, {"a": 1.0, "b": 3.0})
+    write_summary(str(tmp_path), 60, {"c": 2.0, "d": 5.0, "e": 4.0})
+    write_manifest({"snapshot": datetime.now().isoformat(), "timeframes": [30, 60]}, str(tmp_path))
+    assert get_top_pair_addresses(2, 60, str(tmp_path)) == ["d", "e"]
+
+def test_top_pairs_fall_back_to_shorter_timeframe(tmp_path):
+    # Less than an hour of snapshots, so the 60 minute summary was not prewarmed
+    write_summary(str(tmp_path), 5, {"a": 9.0})
+    write_summary(str(tmp_path), 15, {"a": 1.0, "b": 3.0, "c": 2.0})
+    write_manifest({"snapshot": datetime.now().isoformat(), "timeframes": [5, 15]}, str(tmp_path))
+    assert get_top_pair_addresses(2, 60, str(tmp_path)) == ["b", "c"]
+
+def test_top_pairs_before_first_prewarm(tmp_path):
+    assert get_top_pair_addresses(2, 60, str(tmp_path)) == []
+
+def test_prewarm_summaries(tmp_path):
+    db_name = str(tmp_path / "meteora.duckdb")
+    prewarm_path = str(tmp_path / "prewarm")
+    conn = setup_database(db_name)
+    assert prewarm_summaries(conn, prewarm_path) is None
+
+    start_time = datetime(2025, 1, 1)
+    for minute in range(20):
+        insert_meteora_api_entries(conn, [{
+            "address": f"Pair{i}", "name": f"TOK{i}-SOL", "mint_x": f"TokMint{i}", "mint_y": config.SOL_MINT,
+            "bin_step": 100, "base_fee_percentage": "1", "hide": False, "is_blacklisted": False,
+            "current_price": 1.0, "liquidity": "1000", "cumulative_fee_volume": str(100 + minute * (i + 1)),
+        } for i in range(3)], start_time + timedelta(minutes=minute))
+    manifest = prewarm_summaries(conn, prewarm_path)
+    conn.close()
+
+    # Only the timeframes with enough snapshots are prewarmed
+    assert manifest == {
+        "snapshot": (start_time + timedelta(minutes=19)).isoformat(),
+        "update_count": 20,
+        "timeframes": [5, 15],
+        "partial_snapshots": {5: 0, 15: 0},
+    }
+    assert read_manifest(prewarm_path)["snapshot"] == start_time + timedelta(minutes=19)
+    assert sorted(os.listdir(prewarm_path)) == ["manifest.json", "summary_15.arrow", "summary_5.arrow"]
+    for num_minutes in (5, 15):
+        summary_data = read_summary(num_minutes, prewarm_path)
+        assert sorted(summary_data["pair_address"]) == ["Pair0", "Pair1", "Pair2"]
+    assert read_summary(30, prewarm_path) is None
+    # Pair2 earns the most fees on the same liquidity
+    assert get_top_pair_addresses(1, 60, prewarm_path) == ["Pair2"]
@@ -0,0 +1,55 @@
+import json
+import os
+import duckdb
+
+from meteora_project.profiling import (
+    ProfiledConnection,
+    format_operator_tree,
+    query_hash,
+    read_profiles,
+    slowest_operator,
+    summarize_profiles,
+    write_profile,
+)
+
+SLOW_QUERY = """
+    SELECT count(*), sum(range % 7)
+    FROM range(5000000)
+    WHERE range % 3 = $remainder
+"""
+
+def test_slow_query_writes_profile(tmp_path):
+    conn = ProfiledConnection(duckdb.connect(), threshold=0.001, profile_path=str(tmp_path))
+    result = conn.execute(SLOW_QUERY, {"remainder": 1}).fetchone()
+    conn.close()
+    assert result[0] == 1666667
+
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith(f"_{query_hash(SLOW_QUERY)}_{os.getpid()}.json")
+    with open(tmp_path / files[0]) as f:
+        entry = json.load(f)
+    assert entry["sql"] == SLOW_QUERY
+    assert entry["parameters"] == {"remainder": 1}
+    assert entry["caller"] == f"{__name__}.test_slow_query_writes_profile"
+    assert entry["seconds"] >= 0.001
+
+    # The profile holds the operator tree of the query
+    operators = format_operator_tree(entry["profile"])
+    assert "RANGE" in operators.upper()
+    name, seconds = slowest_operator(entry["profile"])
+    assert name and seconds is not None
+
+def test_fast_query_writes_nothing(tmp_path):
+    conn = ProfiledConnection(duckdb.connect(), threshold=60, profile_path=str(tmp_path))
+    assert conn.execute("SELECT 42").fetchone() == (42,)
+    conn.execute(SLOW_QUERY, {"remainder": 2}).fetchall()
+    conn.close()
+    assert os.listdir(tmp_path) == []
+
+def test_profile_log_keeps_newest_files(tmp_path):
+    for i in range(5):
+        write_profile({"query_hash": f"q{i % 2}", "logged_at": f"2025-01-01T00:00:0{i}", "caller": "test", "sql": "SELECT 1", "seconds": i, "profile": None}, str(tmp_path), max_files=3)
+    entries = read_profiles(str(tmp_path))
+    assert [entry["seconds"] for entry in entries] == [2, 3, 4]
+    summary = summarize_profiles(entries)
+    assert [(query["query_hash"], query["count"], query["total_seconds"]) for query in summary] == [("q0", 2, 6.0), ("q1", 1, 3.0)]